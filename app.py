@@ -1,6 +1,15 @@
+import importlib
+import os
+from urllib.parse import urlencode
+
 import streamlit as st
-from sections import intro, profile, behavior, spending, insights
-from utils.io import load_data
+from utils.io import DATA_PATH, load_data
+from utils.filters import FILTERS, build_filter_index, filter_mask, filter_options
+from utils.cube import CubeView, evict_coldest, memo_bytes, open_cube
+from utils.store import default_store, fingerprint
+from utils.sample import APPROX_ROWS, SAMPLE_ROWS, stratified_sample
+from utils import ingest, memory, perf, warmup
+from utils.pages import PAGES
 
 # --------------------------
 # Page config
@@ -11,14 +20,64 @@ st.set_page_config(
     page_icon="📊"
 )
 
+# Hot-path timing: always on with DASHBOARD_PERF=1, per session with ?perf=1 (which also shows the panel)
+show_perf_panel = st.query_params.get("perf") == "1"
+perf_run = perf.start_run(perf.ENV_ENABLED or show_perf_panel)
+
 # --------------------------
 # Load Data (with caching)
 # --------------------------
-@st.cache_data
+# One shared, read-only DataFrame for every session (st.cache_data would hand each rerun its own copy)
+@st.cache_resource
 def get_data():
-    return load_data()
+    df = load_data()
+    memory.register_fixed("dataset", df)
+    return df
+
+@st.cache_resource
+def get_filter_index():
+    with perf.span("build_filter_index"):
+        index = build_filter_index(get_data())
+    memory.register_fixed("filter_index", index)
+    return index
+
+@st.cache_resource
+def get_cube():
+    # Restored from the on-disk store after a restart when the dataset and code are unchanged
+    with perf.span("build_cube"):
+        cube = open_cube(get_data(), default_store(), fingerprint(DATA_PATH))
+    memory.register_fixed("cube", cube["tables"])
+    memory.register_cache("query_memo", lambda: memo_bytes(cube), lambda: evict_coldest(cube))
+    return cube
 
-df = get_data()
+@st.cache_resource
+def get_live():
+    # New respondent batches next to the dataset are merged in now, then watched for
+    live = ingest.live_dataset(get_data(), get_filter_index(), get_cube())
+    with perf.span("ingest"):
+        ingest.refresh(live)
+    ingest.start(live)
+    return live
+
+@st.cache_resource(max_entries=1)
+def get_sample(_df, n_rows):
+    # Approximate mode: stratified (region x sexe) sample and its own filter index, redrawn as batches arrive
+    with perf.span("build_sample"):
+        sample = stratified_sample(_df)
+        index = build_filter_index(sample)
+    memory.register_fixed("sample", (sample, index))
+    return sample, index
+
+@st.cache_resource
+def start_warmup():
+    # Once per process: precompute every page x region x gender query in the background
+    return warmup.start(get_cube(), list(PAGES.values())) if warmup.ENABLED else None
+
+with perf.span("get_data"):
+    live = get_live()
+df, filter_index = live["rows"]  # one consistent pair, even while a batch is being ingested
+cube = live["cube"]
+start_warmup()
 # --------------------------
 # Custom CSS (modern sidebar + styled filters)
 # --------------------------
@@ -111,44 +170,61 @@ st.sidebar.markdown("<hr style='border:1px solid rgba(255,255,255,0.25);'>", uns
 # --- Filters ---
 st.sidebar.markdown("### Filters")
 
-regions = ["All"] + sorted(df["region"].dropna().unique().tolist())
-selected_region = st.sidebar.selectbox("Region", regions, key="filter_region")
+selections = {}
+for key, (_, label) in FILTERS.items():
+    if key in filter_index:
+        selections[key] = st.sidebar.multiselect(
+            label, filter_options(filter_index, key), placeholder="All", key=f"filter_{key}"
+        )
 
-sexes = ["All"] + sorted(df["sexe"].dropna().unique().tolist())
-selected_sex = st.sidebar.selectbox("Gender", sexes, key="filter_gender")
+def clear_filters():
+    for key in FILTERS:
+        st.session_state[f"filter_{key}"] = []
 
-# Apply filters globally
-filtered_df = df.copy()
-if selected_region != "All":
-    filtered_df = filtered_df[filtered_df["region"] == selected_region]
-if selected_sex != "All":
-    filtered_df = filtered_df[filtered_df["sexe"] == selected_sex]
+st.sidebar.button("Clear filters", on_click=clear_filters, use_container_width=True)
+
+# Large datasets: draw row-level charts from a stratified sample first, then refine to exact
+use_sample = len(df) > SAMPLE_ROWS and st.sidebar.toggle(
+    "Fast approximate mode", value=len(df) >= APPROX_ROWS, key="approximate",
+    help="Row-level charts are drawn from a stratified sample (labelled with their error bound) "
+         "and refined to exact results once you stop changing filters. Counts and averages are always exact."
+)
+
+# Apply filters globally (precomputed masks, combined without rescanning columns)
+with perf.span("filter"):
+    mask = filter_mask(filter_index, selections, len(df))
+view = CubeView(cube, selections)
 
 # Display current selections beautifully
+selection_lines = "".join(
+    f"{FILTERS[key][1]}: <span>{', '.join(map(str, values)) or 'All'}</span><br>"
+    for key, values in selections.items()
+)
 st.sidebar.markdown(
     f"""
     <div class="filter-tag">
         <strong>Current Selection</strong><br>
-        Region: <span>{selected_region}</span><br>
-        Gender: <span>{selected_sex}</span>
+        {selection_lines}
     </div>
     """,
     unsafe_allow_html=True
 )
 
+# Download the filtered respondents, streamed by the aggregates API (python -m utils.api) when it is deployed
+api_url = os.environ.get("DASHBOARD_API_URL", "").rstrip("/")
+if api_url:
+    query = urlencode({key: values for key, values in selections.items() if values}, doseq=True)
+    st.sidebar.markdown(
+        f"Download filtered data: [CSV]({api_url}/export.csv?{query}) · [Parquet]({api_url}/export.parquet?{query})"
+    )
+
 st.sidebar.markdown("<hr style='border:1px solid rgba(255,255,255,0.25); margin-top:1rem;'>", unsafe_allow_html=True)
 
 
 # --- Page Navigation ---
 page = st.sidebar.radio(
     "Navigation",
-    [
-        "Overview",
-        "Audience Profile",
-        "Online Habits",
-        "Cultural Economy",
-        "Key Findings"
-    ],
+    list(PAGES),
     label_visibility="collapsed",
     key="main_navigation"
 )
@@ -159,16 +235,34 @@ st.sidebar.markdown(
 )
 
 # --------------------------
-# Routing (pass filtered_df)
+# Routing (pass filtered_df + cube view)
 # --------------------------
-with st.spinner("Updating dashboard..."):
-    if page == "Overview":
-        intro.show(filtered_df)
-    elif page == "Audience Profile":
-        profile.show(filtered_df)
-    elif page == "Online Habits":
-        behavior.show(filtered_df)
-    elif page == "Cultural Economy":
-        spending.show(filtered_df)
-    elif page == "Key Findings":
-        insights.show(filtered_df)
+state = (page, sorted((key, sorted(values)) for key, values in selections.items() if values))
+approximate = use_sample and st.session_state.get("refined_state") != state
+with perf.span("filter.rows", approximate=approximate):
+    if approximate:
+        sample, sample_index = get_sample(df, len(df))
+        sample_mask = filter_mask(sample_index, selections, len(sample))
+        filtered_df = sample if sample_mask is None else sample[sample_mask]
+    else:
+        filtered_df = df if mask is None else df[mask]
+# Only the filtered copy (and its mask) belong to this session; the full dataset is shared
+memory.track_session(filtered_rows=None if filtered_df is df else filtered_df, mask=mask)
+
+perf.tag_run(page=page, approximate=approximate)
+perf.lap()
+with st.spinner("Updating dashboard..."), perf.span("page", page=page):
+    section = importlib.import_module(f"sections.{PAGES[page]}")
+    section.show(filtered_df, view)
+
+memory.enforce()
+perf.finish_run(perf_run)
+if show_perf_panel:
+    perf.render_panel(perf_run)
+    memory.render_panel()
+memory.release_session()  # the filtered rows go away with this run
+
+if approximate:
+    # Refine: rerun exactly for this state; any interaction meanwhile preempts the rerun
+    st.session_state["refined_state"] = state
+    st.rerun()
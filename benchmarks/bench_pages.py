@@ -0,0 +1,160 @@
+"""
+Headless per-page render benchmark.
+
+Drives app.py through Streamlit's testing API for every page and a matrix of
+filter states, recording wall time, peak Python memory and the serialized
+figure size of every chart key. Each case is rendered once cold (query,
+figure and narrative caches emptied) and then timed warm. Compares against a saved baseline and exits
+non-zero when any metric regresses beyond its tolerance.
+
+    python benchmarks/bench_pages.py                  # compare with baseline
+    python benchmarks/bench_pages.py --save-baseline  # record a new baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # run as a script: make utils importable
+from utils.filters import FILTERS
+from utils.pages import APP, PAGES, chart_key, headless
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Filter states as {filter key: index of the option(s) to select}; options are read from the app
+FILTER_STATES = {
+    "all": {},
+    "region": {"region": [0]},
+    "gender": {"gender": [0]},
+    "region+gender": {"region": [0], "gender": [1]},
+    "multi-region": {"region": [0, 1, 2]},
+    "age+agglomeration": {"age": [1], "agglomeration": [0]},
+    "spending": {"spending": [1]},
+}
+
+TOLERANCES = {"cold_ms": 0.30, "time_ms": 0.30, "peak_kb": 0.25, "figure_bytes": 0.05}
+# Ignore regressions below these absolute deltas (timer noise, allocator jitter)
+MIN_DELTAS = {"cold_ms": 20.0, "time_ms": 20.0, "peak_kb": 512.0, "figure_bytes": 256}
+
+
+def _apply_state(at, state):
+    for key in FILTERS:
+        widget = at.multiselect(key=f"filter_{key}")
+        widget.set_value([widget.options[i] for i in state.get(key, []) if i < len(widget.options)])
+
+
+def _clear_caches():
+    """Empty the in-process result caches (the dataset and cube stay loaded)."""
+    from utils import memory, narrative  # after run_suite has set up the environment
+
+    memory.evict_all()  # memoized queries and built figures
+    narrative.clear_stats()
+
+
+def measure(at, page, state, repeat):
+    at.radio(key="main_navigation").set_value(page)
+    _apply_state(at, state)
+
+    # Cold: the first viewer of this state computes every aggregate, figure and narrative number
+    _clear_caches()
+    tracemalloc.start()
+    start = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - start) * 1000)
+
+    if at.exception:
+        raise RuntimeError(f"{page} / {state}: {at.exception[0].message}")
+
+    figures = {chart_key(e): len(e.proto.spec.encode("utf-8")) for e in at.get("plotly_chart")}
+    return {
+        "cold_ms": round(cold_ms, 2),
+        "time_ms": round(statistics.median(times), 2),
+        "peak_kb": round(peak / 1024, 1),
+        "figure_bytes": sum(figures.values()),
+        "figures": figures,
+    }
+
+
+def run_suite(pages, states, repeat):
+    headless()
+    os.environ.setdefault("DASHBOARD_WARMUP", "0")  # each case warms its own state; keep the pool off the timings
+    os.environ.setdefault("DASHBOARD_CACHE", "0")  # cold runs must aggregate, not read the disk cache
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    results = {}
+    for page in pages:
+        for name in states:
+            result = measure(at, page, FILTER_STATES[name], repeat)
+            results[f"{page} | {name}"] = result
+            print(f"{page:<18} {name:<18} {result['cold_ms']:>9.1f} ms cold {result['time_ms']:>9.1f} ms {result['peak_kb']:>10.1f} KiB {result['figure_bytes']:>9} B")
+    return results
+
+
+def compare(results, baseline):
+    """Return a list of human-readable regressions against the baseline."""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        metrics = [(metric, current[metric], previous.get(metric)) for metric in TOLERANCES]
+        metrics += [
+            (f"figure_bytes[{key}]", size, previous.get("figures", {}).get(key))
+            for key, size in current["figures"].items()
+        ]
+        for metric, now, before in metrics:
+            base_metric = metric.split("[")[0]
+            if before is None:
+                continue
+            delta = now - before
+            if delta > MIN_DELTAS[base_metric] and delta > before * TOLERANCES[base_metric]:
+                regressions.append(f"{case}: {metric} {before} -> {now} (+{delta / max(before, 1):.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=list(PAGES))
+    parser.add_argument("--states", nargs="+", default=list(FILTER_STATES), choices=list(FILTER_STATES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed reruns per case (median reported)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the raw results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.pages, args.states, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Startup import-time budget check.
+
+Imports exactly the modules app.py imports at the top level, in a fresh
+interpreter with `-X importtime`, and fails (exit 1) when the median
+cumulative import time exceeds the budget or when a deferred heavy module
+(Plotly, the page sections, GeoPandas) is pulled in at startup.
+
+    python benchmarks/import_budget.py --budget-ms 1500
+"""
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / "app.py"
+
+# Must only be imported when a page is routed or a feature needs them
+# (Streamlit itself loads Plotly's core, but not plotly.express)
+DEFERRED = ("plotly.express", "sections", "geopandas", "pyarrow.parquet")
+
+
+def startup_imports():
+    """app.py's top-level import statements, as source lines."""
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(imports):
+    """Cumulative import time (ms) of `imports` in a fresh interpreter, plus every module it loaded."""
+    code = "\n".join(imports)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total_us, loaded = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        loaded.add(name.strip())
+        if not name.startswith("  "):  # top-level entries only: nested time is already included
+            total_us += int(cumulative)
+    return total_us / 1000, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    imports = startup_imports()
+    timings, loaded = [], set()
+    for _ in range(args.runs):
+        elapsed, names = measure(imports)
+        timings.append(elapsed)
+        loaded |= names
+
+    median = statistics.median(timings)
+    leaked = sorted(name for name in loaded if name.startswith(DEFERRED))
+    print(f"startup imports: {'; '.join(imports)}")
+    print(f"median import time {median:.0f} ms (budget {args.budget_ms:.0f} ms, runs {', '.join(f'{t:.0f}' for t in timings)})")
+
+    failed = False
+    if median > args.budget_ms:
+        print("FAIL: import-time budget exceeded")
+        failed = True
+    if leaked:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(leaked[:10])}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Concurrent-session load test.
+
+Simulates N viewers in one process, each an independent Streamlit AppTest
+session sharing the process-wide caches exactly like sessions on a real
+server. Every session navigates the main_navigation pages and changes the
+filter_region / filter_gender filters at random, and the harness reports rerun
+latency percentiles, throughput and process memory.
+
+    python benchmarks/load_test.py --sessions 8 --duration 60
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # run as a script: make utils importable
+from utils.pages import APP, PAGES, headless
+
+
+def rss_mb():
+    """Current and peak resident set size of this process, in MiB."""
+    current = peak = None
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if peak is None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return current, peak
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def session(seed, deadline, think_time, latencies, errors, lock):
+    rng = random.Random(seed)
+    at = AppTest.from_file(str(APP), default_timeout=300)
+    at.run()
+    regions = at.multiselect(key="filter_region").options
+    genders = at.multiselect(key="filter_gender").options
+
+    while time.perf_counter() < deadline:
+        action = rng.random()
+        if action < 0.6:
+            at.radio(key="main_navigation").set_value(rng.choice(list(PAGES)))
+        elif action < 0.8:
+            at.multiselect(key="filter_region").set_value(rng.sample(regions, k=rng.choice([0, 1, 1, 2])))
+        else:
+            at.multiselect(key="filter_gender").set_value(rng.sample(genders, k=rng.choice([0, 1])))
+
+        start = time.perf_counter()
+        at.run()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if at.exception:
+                errors.append(at.exception[0].message)
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def run(sessions, duration, think_time, seed):
+    headless()
+    warm = AppTest.from_file(str(APP), default_timeout=300)
+    warm.run()  # load data and build shared caches before timing
+
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=session, args=(seed + i, deadline, think_time, latencies, errors, lock), daemon=True)
+        for i in range(sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    samples = []
+    while any(thread.is_alive() for thread in threads):
+        samples.append(rss_mb()[0])
+        time.sleep(0.5)
+    wall = time.perf_counter() - start
+    current, peak = rss_mb()
+    samples = [s for s in samples if s is not None]
+
+    return {
+        "sessions": sessions,
+        "duration_s": round(wall, 2),
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else None,
+            "max": round(max(latencies), 1) if latencies else None,
+        },
+        "rss_mb": {
+            "end": round(current, 1) if current else None,
+            "mean": round(statistics.fmean(samples), 1) if samples else None,
+            "peak": round(peak, 1) if peak else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8], help="one run per session count")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per run")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between interactions (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for sessions in args.sessions:
+        report = run(sessions, args.duration, args.think_time, args.seed)
+        reports.append(report)
+        latency, rss = report["latency_ms"], report["rss_mb"]
+        print(
+            f"{sessions:>3} sessions  {report['reruns']:>5} reruns  {report['throughput_rps']:>7.2f} rerun/s  "
+            f"p50 {latency['p50']:>7.1f} ms  p95 {latency['p95']:>7.1f} ms  p99 {latency['p99']:>7.1f} ms  "
+            f"RSS {rss['end']} MiB (peak {rss['peak']})  errors {report['errors']}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(reports, indent=2))
+    return 1 if any(report["errors"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,43 @@
 import streamlit as st
-from utils.viz import hist, bar
-import plotly.express as px
-import pandas as pd
+from utils.narrative import NO_MATCH, missing, page_stats, pct, rate, share
+from utils.viz import chart_data, draw, queries
+
+CHARTS = ["internet_freq", "vpn", "cracked_apps", "stacked_legal", "streaming_behavior"]
+
+# Cube queries (group-by columns) this page makes; precomputed by the startup warm-up
+QUERIES = queries(*CHARTS)
+
+DAILY = ("Plusieurs fois par jour", "1 fois par jour ou presque")
+LEGAL_OR_MIXED = ("Légale", "Souvent légale", "Autant")
+ILLEGAL = ("Illégale", "Souvent illégale")
+PAID = ("payante", "souvent payante")
+FREE = ("Gratuit", "souvent gratuit")
+
+
+def _stats(view):
+    """Numbers quoted in this page's text, from the charts' aggregates."""
+    vpn, cracked, legal, streaming = (
+        chart_data(view, key) for key in ("vpn", "cracked_apps", "stacked_legal", "streaming_behavior")
+    )
+    men, women = rate(cracked, "utilisation_applis_crackees", "Oui", "gender", ("H", "F"))
+    return {
+        "daily": share(chart_data(view, "internet_freq"), "frequence_internet", DAILY),
+        "vpn_never": share(vpn, "utilisation_vpn", ("jamais",)),
+        "vpn_regular": share(vpn, "utilisation_vpn", ("régulièrement",)),
+        "cracked": share(cracked, "utilisation_applis_crackees", ("Oui",)),
+        "cracked_men": men,
+        "cracked_women": women,
+        "legal_or_mixed": share(legal, "type_conso_legale_ou_illegale", LEGAL_OR_MIXED),
+        "illegal": share(legal, "type_conso_legale_ou_illegale", ILLEGAL),
+        "paid": share(streaming, "utilisation_telechargement_streaming", PAID),
+        "free": share(streaming, "utilisation_telechargement_streaming", FREE),
+        "paid_and_free": share(streaming, "utilisation_telechargement_streaming", ("Autant",)),
+    }
+
+
+def show(df, view):
+    stats = page_stats(view, _stats)
 
-def show(df):
     # --------------------------
     # PAGE TITLE + SHORT INTRO
     # --------------------------
@@ -20,45 +54,11 @@ def show(df):
     st.subheader("Internet Usage Frequency")
 
     if 'frequence_internet' in df.columns:
-    # Compte + pourcentage
-        freq_counts = (
-            df['frequence_internet']
-            .value_counts(normalize=True)
-            .mul(100)
-            .reset_index()
-        )
-        freq_counts.columns = ['Internet Usage Frequency', 'Percentage']
-
-        # Conversion propre en numérique
-        freq_counts['Percentage'] = pd.to_numeric(freq_counts['Percentage'], errors='coerce')
-
-        # Tri logique du plus fréquent au moins fréquent
-        freq_counts = freq_counts.sort_values('Percentage', ascending=False)
-
-        # Création du graphe horizontal
-        fig_freq = px.bar(
-            freq_counts,
-            x='Percentage',
-            y='Internet Usage Frequency',
-            orientation='h',
-            text=freq_counts['Percentage'].map(lambda x: f"{x:.1f}%" if pd.notna(x) else ""),
-            title="How Often Respondents Use the Internet",
-            color='Percentage',
-            color_continuous_scale='Blues'
-        )
-
-        fig_freq.update_layout(
-            xaxis_title="Percentage of Respondents",
-            yaxis_title="",
-            xaxis=dict(showgrid=True, ticksuffix="%"),
-            yaxis=dict(autorange="reversed"),  # pour afficher le plus haut en haut
-        )
-
-        st.plotly_chart(fig_freq, use_container_width=True, key="internet_freq")
+        draw(view, "internet_freq")
 
     # Nouveau texte d’analyse cohérent avec les données
-    st.info("""
-    Nearly **nine out of ten respondents** use the Internet **daily or several times a day**.  
+    st.info(NO_MATCH if missing(stats["daily"]) else f"""
+    **{pct(stats["daily"])} of respondents** use the Internet **daily or several times a day**.  
     This confirms that **digital connectivity has become fully integrated** into everyday life in France where being online is now the default state rather than the exception.
     """)
 
@@ -75,28 +75,11 @@ def show(df):
     st.subheader("VPN Usage")
 
     if 'utilisation_vpn' in df.columns:
-        vpn_counts = df['utilisation_vpn'].value_counts().reset_index()
-        vpn_counts.columns = ['VPN Usage', 'Count']
-        fig_vpn = px.pie(
-            vpn_counts,
-            names='VPN Usage',
-            values='Count',
-            title="VPN Usage Among Respondents",
-            hole=0.5,
-            color_discrete_sequence=px.colors.sequential.Blues_r
-        )
-        fig_vpn.update_traces(
-            textinfo='percent+label',
-            textposition='outside',
-            textfont_size=14,
-            pull=[0.05] * len(vpn_counts)
-        )
-        fig_vpn.update_layout(showlegend=True)
-        st.plotly_chart(fig_vpn, use_container_width=True, key="vpn")
-
-    st.info("""  
-    VPN usage remains **limited**, with the majority never using one.  
-    However, a small segment of **digitally-aware users** adopts VPNs to enhance privacy or bypass regional restrictions.
+        draw(view, "vpn")
+
+    st.info(NO_MATCH if missing(stats["vpn_never"], stats["vpn_regular"]) else f"""  
+    VPN usage remains **{'limited' if stats["vpn_never"] >= 50 else 'widespread'}**: **{pct(stats["vpn_never"])} never use one**.  
+    A segment of **digitally-aware users** ({pct(stats["vpn_regular"])} use one regularly) adopts VPNs to enhance privacy or bypass regional restrictions.
     """)
 
     st.markdown("---")
@@ -107,25 +90,11 @@ def show(df):
     st.subheader("Cracked Apps Usage vs Gender")
 
     if 'utilisation_applis_crackees' in df.columns and 'sexe' in df.columns:
-        cracked_counts = df.groupby(['utilisation_applis_crackees', 'sexe']).size().reset_index(name='Count')
-        fig_crack = px.bar(
-            cracked_counts,
-            x='utilisation_applis_crackees',
-            y='Count',
-            color='sexe',
-            barmode='group',
-            title="Cracked Apps Usage by Gender",
-            text_auto=True,
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-        fig_crack.update_layout(
-            xaxis_title="Cracked Apps Usage Frequency",
-            yaxis_title="Number of Respondents"
-        )
-        st.plotly_chart(fig_crack, use_container_width=True, key="cracked_apps")
-
-    st.info("""  
-    Using cracked apps remains **marginal overall**, with slightly higher rates among men.  
+        draw(view, "cracked_apps")
+
+    st.info(NO_MATCH if missing(stats["cracked"]) else f"""  
+    Using cracked apps remains **{'marginal' if stats["cracked"] < 20 else 'common'} overall** ({pct(stats["cracked"])} of respondents), 
+    at **{pct(stats["cracked_men"])} among men** and **{pct(stats["cracked_women"])} among women**.  
     This behavior is typically linked to **younger, more tech-savvy users** who explore free access alternatives.
     """)
 
@@ -137,28 +106,15 @@ def show(df):
     st.subheader("Legal vs. Illegal Consumption by Frequency")
 
     if 'type_conso_legale_ou_illegale' in df.columns and 'frequence_conso_culturelle' in df.columns:
-        cross = pd.crosstab(df['frequence_conso_culturelle'], df['type_conso_legale_ou_illegale'])
-        cross = cross.reset_index().melt(id_vars='frequence_conso_culturelle', var_name='Type', value_name='Count')
-
-        fig_stack = px.bar(
-            cross,
-            x='frequence_conso_culturelle',
-            y='Count',
-            color='Type',
-            title="Frequency of Cultural Consumption by Legal/Illegal Access",
-            text_auto=True,
-            barmode='stack',
-            color_discrete_sequence=px.colors.sequential.Blues
-        )
-        fig_stack.update_layout(
-            xaxis_title="Frequency of Cultural Consumption",
-            yaxis_title="Number of Respondents"
-        )
-        st.plotly_chart(fig_stack, use_container_width=True, key="stacked_legal")
-
-    st.info("""  
-    Most respondents primarily rely on **legal or mixed (hybrid)** platforms for cultural consumption.  
-    Fully illegal practices are **rare and declining**, indicating growing preference for accessible, legitimate content.
+        draw(view, "stacked_legal")
+
+    if stats["illegal"] < 10:
+        illegal = f"Mostly or fully illegal practices are **rare** ({pct(stats['illegal'])}), indicating a preference for accessible, legitimate content."
+    else:
+        illegal = f"Mostly or fully illegal practices are **frequent** ({pct(stats['illegal'])}): a sizeable part of this audience turns to unauthorized sources."
+    st.info(NO_MATCH if missing(stats["legal_or_mixed"], stats["illegal"]) else f"""  
+    **{pct(stats["legal_or_mixed"])} of respondents** primarily rely on **legal or mixed (hybrid)** platforms for cultural consumption.  
+    {illegal}
     """)
 
     st.markdown("---")
@@ -169,27 +125,11 @@ def show(df):
     st.subheader("Streaming or Downloading Habits")
 
     if 'utilisation_telechargement_streaming' in df.columns:
-        stream_counts = df['utilisation_telechargement_streaming'].value_counts().reset_index()
-        stream_counts.columns = ['Streaming/Downloading Behavior', 'Count']
-        fig_stream = px.bar(
-            stream_counts,
-            x='Count',
-            y='Streaming/Downloading Behavior',
-            orientation='h',
-            title="Streaming and Downloading Habits",
-            text_auto=True,
-            color='Count',
-            color_continuous_scale='Blues'
-        )
-        fig_stream.update_layout(
-            xaxis_title="Number of Respondents",
-            yaxis_title="Streaming / Downloading Frequency"
-        )
-        st.plotly_chart(fig_stream, use_container_width=True, key="streaming_behavior")
-
-    st.info("""  
-    Streaming dominates over downloading, showing a **shift toward on-demand, always-connected access**.  
-    Occasional downloads remain but are mostly performed by **older respondents** or those with limited connection stability.
+        draw(view, "streaming_behavior")
+
+    st.info(NO_MATCH if missing(stats["paid"], stats["free"]) else f"""  
+    **{pct(stats["paid"])} of respondents** who stream or download mostly **pay** for it, against **{pct(stats["free"])}** who mostly rely on **free** sources ({pct(stats["paid_and_free"])} do both equally).  
+    {'Paid offers lead' if stats["paid"] >= stats["free"] else 'Free sources lead'}, showing {'a **willingness to pay for on-demand access**' if stats["paid"] >= stats["free"] else 'a **strong preference for free access**'}.
     """)
 
     st.markdown("---")
@@ -213,7 +153,7 @@ def show(df):
             Digital cultural consumption in France is characterized by 
             <strong>constant Internet connectivity</strong>, 
             <strong>low but rising VPN awareness</strong>, and 
-            <strong>predominantly legal streaming practices</strong>.  
+            <strong>predominantly legal consumption practices</strong>.  
             A minority of younger users explore cracked apps or hybrid content sources, 
             but the overall trend highlights a 
             <strong>mature, responsible, and convenience-driven audience</strong> 
@@ -1,14 +1,39 @@
 import streamlit as st
-import plotly.express as px
-import pandas as pd
-
-def show(df):
-    # --------------------------
-    # CLEAN & SAFEGUARD AGE COLUMN
-    # --------------------------
-    if 'age' in df.columns:
-        df['age'] = pd.to_numeric(df['age'], errors='coerce')  # force en numérique
-        df = df[df['age'].notna()]  # supprime les NaN éventuels
+from utils.cube import query
+from utils.filters import AGE_LABELS
+from utils.narrative import NO_MATCH, compare, euros, extremes, missing, page_stats, pct, pooled_mean, share
+from utils.viz import chart_data, draw, queries
+
+CHARTS = ["spend_freq", "spending_age"]
+# Cube queries (group-by columns) this page makes; precomputed by the startup warm-up
+QUERIES = queries(*CHARTS)
+
+DAILY = ("Tous les jours ou presque",)
+LESS_OFTEN = ("1 à 5 fois par semaine", "1 à 3 fois par mois", "Moins souvent")
+
+
+def _stats(view):
+    """Numbers quoted in this page's text, from the charts' aggregates."""
+    by_age = chart_data(view, "spending_age")
+    (top_age, top_spend), (bottom_age, bottom_spend) = extremes(by_age, 'age')
+    youngest = by_age.loc[by_age['age'] == AGE_LABELS[0], 'value']
+    # Total spending per band (count x mean), from the cube cells
+    totals = query(view.cube, ('age',), view.selections).dropna(subset=['age']).rename(columns={'spend_sum': 'value'})
+    top_band = totals.loc[totals['value'].idxmax(), 'age'] if totals['value'].sum() else "n/a"
+    return {
+        "daily_spend": pooled_mean(view, 'frequence_conso_culturelle', 'spend', DAILY),
+        "less_often_spend": pooled_mean(view, 'frequence_conso_culturelle', 'spend', LESS_OFTEN),
+        "top_age": top_age, "top_spend": top_spend,
+        "bottom_age": bottom_age, "bottom_spend": bottom_spend,
+        "youngest_spend": youngest.iloc[0] if len(youngest) else float("nan"),
+        "average_spend": view.total('spend'),
+        "top_spending_band": top_band,
+        "top_spending_share": share(totals, 'age', (top_band,)),
+    }
+
+
+def show(df, view):
+    stats = page_stats(view, _stats)
 
     # --------------------------
     # PAGE HEADER
@@ -25,31 +50,12 @@ def show(df):
     # --------------------------
     st.subheader("Average Monthly Spending by Cultural Consumption Frequency")
 
-    avg_by_freq = (
-        df.groupby('frequence_conso_culturelle')['depense_mensuelle_culturelle']
-        .mean().reset_index()
-        .sort_values('depense_mensuelle_culturelle', ascending=False)
-    )
-
-    fig_bar = px.bar(
-        avg_by_freq,
-        x='frequence_conso_culturelle',
-        y='depense_mensuelle_culturelle',
-        title="Average Monthly Spending by Cultural Consumption Frequency",
-        text_auto=True,
-        color='depense_mensuelle_culturelle',
-        color_continuous_scale='Blues'
-    )
-    fig_bar.update_layout(
-        xaxis_title="Cultural Consumption Frequency",
-        yaxis_title="Average Monthly Spending (€)"
-    )
-    st.plotly_chart(fig_bar, use_container_width=True, key="spend_freq")
-
-    st.info("""
-    Frequent cultural consumers tend to spend more overall.  
-    Regular engagement is closely tied to higher investment, 
-    confirming that **habitual cultural activity directly drives economic value**.
+    draw(view, "spend_freq")
+
+    compared = compare(stats["daily_spend"], stats["less_often_spend"])
+    st.info(NO_MATCH if missing(stats["daily_spend"], stats["less_often_spend"]) else f"""
+    Daily cultural consumers spend **{euros(stats["daily_spend"])}** per month on average, {compared} less frequent consumers ({euros(stats["less_often_spend"])}).  
+    {'Regular engagement is closely tied to higher investment, confirming that **habitual cultural activity directly drives economic value**.' if compared == 'more than' else 'In this selection, frequency of use does not translate into higher spending.'}
     """)
 
     st.markdown("---")
@@ -59,43 +65,19 @@ def show(df):
     # --------------------------
     st.subheader("Average Cultural Spending by Age Group")
 
-    if 'age' in df.columns:
-        # 🧹 Clean and filter valid age range
-        df_age = df[df['age'].between(15, 80, inclusive='both')]
-
-        if not df_age.empty:
-            df_age['age_group'] = pd.cut(
-                df_age['age'],
-                bins=[15, 25, 35, 45, 55, 65, 80],
-                labels=["15–24", "25–34", "35–44", "45–54", "55–64", "65+"]
-            )
-
-            avg_spend_age = (
-                df_age.groupby('age_group')['depense_mensuelle_culturelle']
-                .mean()
-                .reset_index()
-            )
-
-            fig_age = px.bar(
-                avg_spend_age,
-                x='age_group',
-                y='depense_mensuelle_culturelle',
-                title="Average Monthly Cultural Spending by Age Group",
-                text_auto=True,
-                color='depense_mensuelle_culturelle',
-                color_continuous_scale='Blues'
-            )
-            fig_age.update_layout(
-                xaxis_title="Age Group",
-                yaxis_title="Average Spending (€)"
-            )
-            st.plotly_chart(fig_age, use_container_width=True, key="spending_age")
-
-    st.info("""
-    Adults aged **30 to 55** are the backbone of the digital cultural economy.  
-    They combine **financial stability** and **digital fluency**, 
-    while younger users show strong engagement but limited financial contribution.
+    # Age groups come pre-aggregated as the age-band filter dimension
+    if 'age' in df.columns and len(chart_data(view, "spending_age")):
+        draw(view, "spending_age")
+
+    if missing(stats["top_age"], stats["top_spend"]):
+        st.info(NO_MATCH)
+    elif stats["top_age"] != stats["bottom_age"]:
+        st.info(f"""
+    Respondents aged **{stats["top_age"]}** spend the most on digital culture ({euros(stats["top_spend"])} per month on average), 
+    and those aged **{stats["bottom_age"]}** the least ({euros(stats["bottom_spend"])}).  
     """)
+    else:
+        st.info(f"Respondents aged **{stats['top_age']}** spend {euros(stats['top_spend'])} per month on average on digital culture.")
 
     st.markdown("---")
 
@@ -104,16 +86,31 @@ def show(df):
     # --------------------------
     st.subheader("Key Insights")
 
+    if missing(stats["daily_spend"], stats["less_often_spend"]):
+        activity = f"**Activity and spending**: {NO_MATCH.lower()}"
+    elif compare(stats["daily_spend"], stats["less_often_spend"]) == "more than":
+        activity = "**More activity → more spending**."
+    else:
+        activity = "**More activity** does not bring more spending here."
+    if missing(stats["top_spending_band"], stats["top_spending_share"]):
+        top_band = f"**Share of total spending by age**: {NO_MATCH.lower()}"
+    else:
+        top_band = f"The **{stats['top_spending_band']}** band accounts for the largest share of total spending ({pct(stats['top_spending_share'])})."
+    if missing(stats["youngest_spend"], stats["average_spend"]):
+        youngest = f"**Younger users ({AGE_LABELS[0]})**: {NO_MATCH.lower()}"
+    else:
+        youngest = (f"**Younger users ({AGE_LABELS[0]})** spend {compare(stats['youngest_spend'], stats['average_spend'])} "
+                    f"the average respondent ({euros(stats['youngest_spend'])} vs {euros(stats['average_spend'])}).")
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown("""
-        - **More activity → more spending**, regardless of VPN use.  
+        st.markdown(f"""
+        - {activity}  
         - **Hybrid models** (free + paid) dominate digital culture.  
-        - **Middle-aged audiences** drive the market’s revenue.  
+        - {top_band}  
         """)
     with col2:
-        st.markdown("""
-        - **Younger users** engage often but spend less.  
+        st.markdown(f"""
+        - {youngest}  
         - **Privacy awareness** doesn’t reduce payment behavior.  
         - **Account sharing** reshapes traditional monetization.  
         """)
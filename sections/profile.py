@@ -1,8 +1,59 @@
 import streamlit as st
-from utils.viz import pie, hist, bar, count_df
-import plotly.express as px
+from utils.viz import box, draw, hist, queries
+from utils.filters import AGE_LABELS
+from utils.narrative import NO_MATCH, leaders, listing, missing, page_stats, pct, rate, share
+from utils.perf import plotly_chart
+
+CHARTS = ["gender", "region", "agglo", "employment", "household", "household_status"]
+# Cube queries (group-by columns) this page makes; precomputed by the startup warm-up
+QUERIES = queries(*CHARTS) + [('age',), ('employment', 'age'), ('frequence_conso_culturelle', 'age')]
+
+WORKING_AGE = AGE_LABELS[1:4]  # 25–54
+YOUNGER = AGE_LABELS[:2]  # under 35
+OLDER = AGE_LABELS[3:]  # 45 and over
+RURAL = ("Rural isolé", "Rural périurbain")
+DAILY_CULTURE = "Tous les jours ou presque"
+
+
+def _main_status(jobs, bands):
+    """'**status** (x%)' of the most common employment status within the given age bands."""
+    group = jobs[jobs['age'].isin(bands)].groupby('employment', as_index=False)['Count'].sum()
+    return listing(leaders(group, 'employment', 1))
+
+
+def _most_daily_band(view):
+    """(age band, %) with the highest share of daily cultural consumers."""
+    culture = view.counts('frequence_conso_culturelle', 'age', sort=False)
+    bands = [band for band in AGE_LABELS if band in set(culture['age'])]
+    rates = rate(culture, 'frequence_conso_culturelle', DAILY_CULTURE, 'age', bands)
+    return max(zip(bands, rates), key=lambda item: item[1], default=("n/a", float("nan")))
+
+
+def _stats(view):
+    """Numbers quoted in this page's text, from the charts' aggregates."""
+    genders, status = view.counts('gender'), view.counts('statut_foyer')
+    jobs = view.counts('employment', 'age', sort=False)
+    daily_band, daily_rate = _most_daily_band(view)
+    return {
+        "men": share(genders, 'gender', ('H',)),
+        "women": share(genders, 'gender', ('F',)),
+        "working_age": share(view.counts('age'), 'age', WORKING_AGE),
+        "main_regions": listing(leaders(view.counts('region'), 'region', 3)),
+        "rural": share(view.counts('agglomeration'), 'agglomeration', RURAL),
+        "main_jobs": listing(leaders(view.counts('employment'), 'employment', 3)),
+        "younger_job": _main_status(jobs, YOUNGER),
+        "older_job": _main_status(jobs, OLDER),
+        "daily_band": daily_band, "daily_rate": daily_rate,
+        "main_sizes": listing(leaders(view.counts('taille_foyer'), 'taille_foyer', 3)),
+        "couple": share(status, 'statut_foyer', ('couple',)),
+        "single": share(status, 'statut_foyer', ('célibataire',)),
+        "child": share(status, 'statut_foyer', ('enfant',)),
+    }
+
+
+def show(df, view):
+    stats = page_stats(view, _stats)
 
-def show(df):
     st.header("Who Are France’s Digital Culture Consumers?")
 
     st.markdown("""
@@ -17,19 +68,17 @@ def show(df):
 
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(
-            pie(df, names='sexe', title="Gender Distribution"),
-            use_container_width=True, key="gender"
-        )
+        draw(view, "gender")
     with col2:
-        st.plotly_chart(
+        plotly_chart(
             hist(df, x='age', title="Age Distribution (Respondents)"),
             use_container_width=True, key="age"
         )
 
-    st.info("""
-    The audience is almost evenly split between **men (48%) and women (52%)**, indicating that **digital cultural consumption in France is not gender-skewed**.  
-    The **core age group (30–55 years)** dominates cultural consumption, showing that **digital habits are strongest among working-age adults** who combine **purchasing power** and **digital familiarity**.
+    balanced = abs(stats["men"] - stats["women"]) < 10
+    st.info(NO_MATCH if missing(stats["men"], stats["women"], stats["working_age"]) else f"""
+    The audience is {'almost evenly split' if balanced else 'split'} between **men ({pct(stats["men"])}) and women ({pct(stats["women"])})**, indicating that **digital cultural consumption in France is {'not ' if balanced else ''}gender-skewed**.  
+    The **core age group (25–54 years)** makes up **{pct(stats["working_age"])}** of respondents, showing that **digital habits are strongest among working-age adults** who combine **purchasing power** and **digital familiarity**.
     """)
 
     st.markdown("---")
@@ -39,22 +88,14 @@ def show(df):
     # --------------------------
     st.subheader("Geographic and Urban Context")
 
-    region_counts = count_df(df, 'region', 'Region')
-    st.plotly_chart(
-        bar(region_counts, 'Region', 'Count', "Respondents by Region"),
-        use_container_width=True, key="region"
-    )
+    draw(view, "region")
 
     if 'type_agglomeration' in df.columns:
-        agglo_counts = count_df(df, 'type_agglomeration', 'Agglomeration Type')
-        st.plotly_chart(
-            bar(agglo_counts, 'Agglomeration Type', 'Count', "Type of Urban Area"),
-            use_container_width=True, key="agglo"
-        )
+        draw(view, "agglo")
 
-    st.info("""
-    Respondents are concentrated in **major urban and peri-urban areas**, with strong representation in **Île-de-France**, **Provence-Alpes-Côte d’Azur**, and **Pays de la Loire**.  
-    Interestingly, a growing share comes from **rural zones**, suggesting that **digital access and cultural platforms now extend beyond metropolitan centers**.
+    st.info(NO_MATCH if missing(stats["main_regions"], stats["rural"]) else f"""
+    Respondents come mainly from {stats["main_regions"]}.  
+    Interestingly, **{pct(stats["rural"])}** live in **rural zones**, suggesting that **digital access and cultural platforms now extend beyond metropolitan centers**.
     """)
 
     st.markdown("---")
@@ -65,30 +106,20 @@ def show(df):
     st.subheader("Employment and Professional Status")
 
     if 'statut_emploi' in df.columns:
-        emploi_counts = count_df(df, 'statut_emploi', 'Employment Status')
-        st.plotly_chart(
-            bar(emploi_counts, 'Employment Status', 'Count', "Employment Status of Respondents"),
-            use_container_width=True, key="employment"
-        )
+        draw(view, "employment")
 
     if 'profession_principale' in df.columns and 'statut_emploi' in df.columns:
-        fig_box = px.box(
-            df,
-            x='statut_emploi',
-            y='age',
-            title="Age Distribution by Employment Status",
-            color='statut_emploi'
-        )
+        fig_box = box(df, x='statut_emploi', y='age', title="Age Distribution by Employment Status", color='statut_emploi')
         fig_box.update_layout(
             xaxis_title="Employment Status",
             yaxis_title="Age"
         )
-        st.plotly_chart(fig_box, use_container_width=True, key="employment_age")
+        plotly_chart(fig_box, use_container_width=True, key="employment_age")
 
-    st.info("""
-    - Most participants are **private-sector employees** (“Salarié du privé ou association”), followed by **public-sector workers** and **self-employed individuals**.  
-    - Younger respondents (**25–40 years old**) are concentrated in private employment, while **older groups** dominate public service and managerial roles.  
-    - This indicates that **professional stability and digital adoption evolve with career stage**: mid-career workers remain the **most active online cultural consumers**.
+    st.info(NO_MATCH if missing(stats["main_jobs"], stats["daily_rate"]) else f"""
+    - The largest groups are {stats["main_jobs"]}.  
+    - Among respondents **under 35**, the most common status is {stats["younger_job"]}; among those **45 and over**, it is {stats["older_job"]}.  
+    - The **{stats["daily_band"]}** age band has the highest share of **daily cultural consumers** ({pct(stats["daily_rate"])}).
     """)
 
     st.markdown("---")
@@ -99,21 +130,14 @@ def show(df):
     st.subheader("Household Structure")
 
     if 'taille_foyer' in df.columns:
-        foyer_counts = count_df(df, 'taille_foyer', 'Household Size')
-        st.plotly_chart(
-            bar(foyer_counts, 'Household Size', 'Count', "Household Size Distribution"),
-            use_container_width=True, key="household"
-        )
+        draw(view, "household")
 
     if 'statut_foyer' in df.columns:
-        st.plotly_chart(
-            pie(df, names='statut_foyer', title="Household Status (Single, Couple, etc.)"),
-            use_container_width=True, key="household_status"
-        )
+        draw(view, "household_status")
 
-    st.info("""
-    - The majority live in **two-person households**, followed by **single** and **three-person households**, suggesting many **young couples or small families**.  
-    - Over **60% identify as couples**, while **30% are single** and a small share are **children living with parents**.  
+    st.info(NO_MATCH if missing(stats["main_sizes"], stats["couple"]) else f"""
+    - The most common household sizes are {stats["main_sizes"]}, suggesting many **young couples or small families**.  
+    - **{pct(stats["couple"])} identify as couples**, while **{pct(stats["single"])} are single** and **{pct(stats["child"])}** are **children living with parents**.  
     - This composition supports the idea that **digital cultural spending is driven by adults with moderate family obligations and stable incomes**.
     """)
 
@@ -1,11 +1,37 @@
 import streamlit as st
-from utils.viz import pie, bar
-import plotly.express as px
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
+from utils.filters import SPENDING_LABELS
+from utils.narrative import NO_MATCH, compare, euros, missing, page_stats, pct, pooled_mean, share
+from utils.viz import chart_data, draw, queries
+
+CHARTS = ["spending_donut", "paid", "access", "spend_type"]
+
+# Cube queries (group-by columns) this page makes; precomputed by the startup warm-up
+QUERIES = queries(*CHARTS)
+
+MIXED = ("souvent gratuit", "autant", "souvent payante")
+PAID_ACCESS = ("compte partagé", "abonné")
+LEGAL = ("Légale", "Souvent légale")
+ILLEGAL_OR_HYBRID = ("Autant", "Souvent illégale", "Illégale")
+
+
+def _stats(view):
+    """Numbers quoted in this page's text, from the charts' aggregates."""
+    brackets, paid = chart_data(view, "spending_donut"), chart_data(view, "paid")
+    return {
+        "low": share(brackets, "spending", SPENDING_LABELS[:2]),
+        "high": share(brackets, "spending", SPENDING_LABELS[3:]),
+        "mixed": share(paid, "gratuit_ou_payant", MIXED),
+        "free_only": share(paid, "gratuit_ou_payant", ("gratuit",)),
+        "paid_only": share(paid, "gratuit_ou_payant", ("payante",)),
+        "shared": share(chart_data(view, "access"), "acces_services_payants", ("compte partagé",), among=PAID_ACCESS),
+        "legal_spend": pooled_mean(view, "type_conso_legale_ou_illegale", "spend", LEGAL),
+        "other_spend": pooled_mean(view, "type_conso_legale_ou_illegale", "spend", ILLEGAL_OR_HYBRID),
+    }
+
+
+def show(df, view):
+    stats = page_stats(view, _stats)
 
-def show(df):
     # --------------------------
     # PAGE TITLE + SHORT INTRO
     # --------------------------
@@ -22,29 +48,11 @@ def show(df):
     # --------------------------
     st.subheader("Monthly Cultural Spending")
 
-    # Clean values: remove negatives, extreme outliers (> 200€)
-
-    bins = [0, 10, 30, 60, 100, np.inf]
-    labels = ["€0–10", "€10–30", "€30–60", "€60–100", "€100+"]
-    df['spending_group'] = pd.cut(df['depense_mensuelle_culturelle'], bins=bins, labels=labels, right=False)
-
-    group_counts = df['spending_group'].value_counts().reset_index()
-    group_counts.columns = ['Spending Range', 'Count']
-
-    fig_donut = px.pie(
-        group_counts,
-        names='Spending Range',
-        values='Count',
-        title="Cultural Spending Brackets",
-        hole=0.4,
-        color_discrete_sequence=px.colors.sequential.Blues_r
-    )
-    fig_donut.update_traces(textinfo='percent+label', textposition='outside')
-    st.plotly_chart(fig_donut, use_container_width=True, key="spending_donut")
-
-    st.info("""
-    Nearly **70 % of users spend less than €30 per month**, confirming that **low spending dominates** the digital cultural economy.  
-    Only a small fraction of heavy contributors (> €60) support premium content and subscriptions.
+    draw(view, "spending_donut")
+
+    st.info(NO_MATCH if missing(stats["low"], stats["high"]) else f"""
+    **{pct(stats["low"])} of users spend less than €30 per month**, {'confirming that **low spending dominates** the digital cultural economy' if stats["low"] >= 50 else 'so **low spending does not dominate** this audience'}.  
+    Heavy contributors (> €60, {pct(stats["high"])} of users) support premium content and subscriptions.
     """)
     st.markdown("---")
 
@@ -54,18 +62,10 @@ def show(df):
     st.subheader("Free vs Paid Consumption")
 
     if 'gratuit_ou_payant' in df.columns:
-        paid_counts = df['gratuit_ou_payant'].value_counts().reset_index()
-        paid_counts.columns = ['Consumption Type', 'Count']
-        fig_paid = bar(
-            paid_counts,
-            'Consumption Type',
-            'Count',
-            "Free vs Paid Consumption"
-        )
-        st.plotly_chart(fig_paid, use_container_width=True, key="paid")
-
-    st.info("""
-    The majority of users combine **free and paid content**, illustrating the **hybrid nature** of cultural consumption.  
+        draw(view, "paid")
+
+    st.info(NO_MATCH if missing(stats["mixed"]) else f"""
+    **{pct(stats["mixed"])} of users combine free and paid content**, while {pct(stats["free_only"])} consume only free content and {pct(stats["paid_only"])} only paid content.  
     This balance between **convenience (free)** and **quality (paid)** shows a flexible digital economy adapting to user expectations.
     """)
 
@@ -77,20 +77,11 @@ def show(df):
     st.subheader("Access to Paid Services")
 
     if 'acces_services_payants' in df.columns:
-        df_access = df[df['acces_services_payants'].notna()]
-        df_access = df_access[df_access['acces_services_payants'].str.lower() != 'null']
-
-        fig_access = pie(
-            df_access,
-            names='acces_services_payants',
-            title="Access to Paid Services"
-        )
-        fig_access.update_traces(textinfo='percent+label', textposition='outside')
-        st.plotly_chart(fig_access, use_container_width=True, key="access")
-
-    st.info("""
-    Among paid users, **account sharing** is a widespread practice, while a smaller segment maintains **individual subscriptions**.  
-    This indicates a cultural shift toward **shared digital access models**, blurring the line between private and collective use.
+        draw(view, "access")
+
+    st.info(NO_MATCH if missing(stats["shared"]) else f"""
+    Among paid users, **{pct(stats["shared"])} share an account**, while {pct(100 - stats["shared"])} maintain **individual subscriptions**.  
+    {'This indicates a cultural shift toward **shared digital access models**, blurring the line between private and collective use.' if stats["shared"] >= 50 else '**Individual subscriptions** remain the main way to access paid services in this selection.'}
     """)
 
     st.markdown("---")
@@ -101,24 +92,13 @@ def show(df):
     st.subheader("Spending by Consumption Type")
 
     if 'type_conso_legale_ou_illegale' in df.columns:
-        avg_spend_by_type = df.groupby('type_conso_legale_ou_illegale')['depense_mensuelle_culturelle'].mean().reset_index()
-        avg_spend_by_type.columns = ['Consumption Type', 'Average Monthly Spending (€)']
-
-        fig_spend_type = px.bar(
-            avg_spend_by_type,
-            x='Consumption Type',
-            y='Average Monthly Spending (€)',
-            title="Average Monthly Spending by Legal vs Illegal Consumption",
-            text_auto=True,
-            color='Average Monthly Spending (€)',
-            color_continuous_scale='Blues'
-        )
-        fig_spend_type.update_layout(xaxis_title="Consumption Type", yaxis_title="Average Spending (€)")
-        st.plotly_chart(fig_spend_type, use_container_width=True, key="spend_type")
-
-    st.info("""
-    Consumers focusing on **legal platforms** spend considerably more than those engaging in **illegal or hybrid practices**.  
-    This demonstrates that **trust and content legitimacy** directly correlate with **economic contribution**.
+        draw(view, "spend_type")
+
+    compared = compare(stats["legal_spend"], stats["other_spend"])
+    st.info(NO_MATCH if missing(stats["legal_spend"], stats["other_spend"]) else f"""
+    Consumers focusing on **legal platforms** spend **{euros(stats["legal_spend"])}** per month on average, 
+    {compared} those engaging in **illegal or hybrid practices** ({euros(stats["other_spend"])}).  
+    {'This suggests that **trust and content legitimacy** go hand in hand with **economic contribution**.' if compared == 'more than' else 'Content legitimacy alone does not drive **economic contribution** in this selection.'}
     """)
 
     st.markdown("---")
@@ -0,0 +1,16 @@
+import importlib.util
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_benchmark(name):
+    spec = importlib.util.spec_from_file_location(name, ROOT / "benchmarks" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_startup_imports_stay_within_budget():
+    # Fails when app.py's top-level imports exceed the budget or pull in a deferred module
+    assert _load_benchmark("import_budget").main(["--runs", "3"]) == 0
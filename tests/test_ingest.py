@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils.cube import build_cube, query
+from utils.filters import build_filter_index
+from utils.ingest import ingest, live_dataset
+from utils.io import clean_dataset, read_dataset
+
+ROOT = Path(__file__).resolve().parents[1]
+BATCH_ROWS = 200
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return read_dataset(ROOT / "data" / "data.xlsx")
+
+
+def _columnar(df):
+    """The dataset as a columnar (.parquet) source loads: text columns as categoricals."""
+    return df.astype({column: "category" for column in df.columns if not pd.api.types.is_numeric_dtype(df[column])})
+
+
+def _live(df):
+    return live_dataset(df, build_filter_index(df), build_cube(df))
+
+
+def _split(raw):
+    base = clean_dataset(raw.iloc[:-BATCH_ROWS].reset_index(drop=True))
+    batch = clean_dataset(raw.iloc[-BATCH_ROWS:].reset_index(drop=True))
+    batch.loc[:9, "region"] = "Guyane"  # a value the dataset has never seen
+    return base, batch
+
+
+def test_ingest_keeps_dtypes_and_memory(raw):
+    base, batch = _split(raw)
+    before = _columnar(base)
+    live = _live(before)
+    ingest(live, batch, "batch")
+    after, index = live["rows"]
+
+    assert len(after) == len(before) + BATCH_ROWS
+    for column in before.columns:
+        if isinstance(before[column].dtype, pd.CategoricalDtype):
+            assert isinstance(after[column].dtype, pd.CategoricalDtype), column
+            assert set(before[column].cat.categories) <= set(after[column].cat.categories), column
+        else:
+            assert after[column].dtype == before[column].dtype, column
+    assert "Guyane" in after["region"].cat.categories and "Guyane" in index["region"]
+    # Appending keeps the per-row footprint: codes are appended, no column turns into strings
+    per_row = before.memory_usage(deep=True).sum() / len(before)
+    assert after.memory_usage(deep=True).sum() <= per_row * len(after) * 1.05
+
+
+def test_ingest_matches_full_rebuild(raw):
+    base, batch = _split(raw)
+    live = _live(base)
+    ingest(live, batch.copy(), "batch")
+    df, index = live["rows"]
+    full = pd.concat([base, batch], ignore_index=True)
+    cube, rebuilt = live["cube"], build_cube(full)
+
+    assert cube["rows"] == len(full) and cube["labels"] == rebuilt["labels"]
+    expected = build_filter_index(full)
+    assert {key: list(masks) for key, masks in index.items()} == {key: list(masks) for key, masks in expected.items()}
+    for key, masks in expected.items():
+        for value, mask in masks.items():
+            assert (index[key][value] == mask).all(), (key, value)
+
+    for by, selections in [
+        (("region",), {}),
+        (("frequence_conso_culturelle", "type_conso_legale_ou_illegale"), {"region": ["Guyane", "Bretagne"]}),
+        (("age",), {"gender": ["F"], "spending": ["€60–100"]}),
+    ]:
+        got = query(cube, by, selections).sort_values(list(by)).reset_index(drop=True)
+        want = query(rebuilt, by, selections).sort_values(list(by)).reset_index(drop=True)
+        got, want = got[got["count"] > 0].reset_index(drop=True), want[want["count"] > 0].reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, want, check_dtype=False)
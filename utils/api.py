@@ -0,0 +1,225 @@
+"""
+Local JSON API serving the dashboard's aggregates.
+
+Loads and cleans the dataset with the dashboard's own loader, opens the same
+pre-aggregated cube (restored from the on-disk cache when warm), ingests and
+then watches for the same batch files, and answers aggregate queries per filter
+state. Filters are query parameters named like
+the sidebar filters, repeated for several values:
+
+    GET /regions?gender=F
+    GET /spend/age?region=Occitanie&region=Bretagne
+    GET /counts?by=frequence_internet&age=25–34
+    GET /export.csv?region=Occitanie          (filtered respondents, streamed)
+
+Every response carries an ETag derived from the dataset (and the batches
+ingested so far), the code version and
+the normalized request, so a client polling with If-None-Match gets an empty
+304 without any work; rendered bodies are also kept in an in-memory LRU.
+Exports stream the filtered rows chunk by chunk from the shared dataset, so
+memory stays flat whatever their size.
+
+    python -m utils.api --port 8502
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils import ingest
+from utils.cube import MEASURES, CubeView, open_cube
+from utils.export import FORMATS as EXPORT_FORMATS
+from utils.filters import FILTERS, build_filter_index, filter_mask
+from utils.io import DATA_PATH, clean_dataset, read_dataset
+from utils.store import CODE_VERSION, default_store, fingerprint
+
+RESPONSE_CACHE_SIZE = 1024
+MAX_AGE = 60  # seconds clients may reuse a response without revalidating
+
+logger = logging.getLogger("dashboard.api")
+
+
+def _param(params, name):
+    values = params.get(name)
+    if not values:
+        raise ValueError(f"missing parameter '{name}'")
+    return values
+
+
+def _by(view, params):
+    """Group-by columns of /counts and /mean: filter keys or pre-aggregated chart columns."""
+    by = _param(params, "by")
+    known = set(view.cube["slices"]) | {dim for table in view.cube["tables"] for dim in table}
+    unknown = [dim for dim in by if dim not in known]
+    if unknown:
+        raise ValueError(f"unknown column(s) {', '.join(unknown)} (expected one of {', '.join(sorted(known))})")
+    if tuple(dim for dim in by if dim not in view.cube["slices"]) not in view.cube["tables"]:
+        raise ValueError(f"columns {', '.join(by)} are not pre-aggregated together")
+    return by
+
+
+def _mean(view, by, measure):
+    if measure not in MEASURES:
+        raise ValueError(f"unknown measure '{measure}' (expected one of {', '.join(MEASURES)})")
+    return view.mean(by, measure)
+
+
+def _totals(view):
+    means = {f"avg_{name}": view.total(name) for name in MEASURES}
+    return {"respondents": view.total(), **{key: None if value != value else float(value) for key, value in means.items()}}
+
+
+# Path -> handler(view, params) returning a DataFrame or a dict
+ROUTES = {
+    "/filters": lambda view, params: {key: view.options(key) for key in FILTERS if view.options(key)},
+    "/total": lambda view, params: _totals(view),
+    "/regions": lambda view, params: view.counts("region", sort=False),
+    "/spend/region": lambda view, params: view.mean("region", "spend"),
+    "/spend/age": lambda view, params: view.mean("age", "spend"),
+    "/spend/consumption-type": lambda view, params: view.mean("type_conso_legale_ou_illegale", "spend"),
+    "/counts": lambda view, params: view.counts(*_by(view, params), sort=False),
+    "/mean": lambda view, params: _mean(view, _by(view, params)[0], params.get("measure", ["spend"])[0]),
+}
+
+
+def _jsonable(result):
+    if hasattr(result, "to_json"):
+        return json.loads(result.to_json(orient="records", force_ascii=False))
+    return result
+
+
+class AggregateService:
+    """Answers API requests from a live dataset (see utils.ingest), with an LRU of rendered responses."""
+
+    def __init__(self, live):
+        self.live = live
+        self.cube = live["cube"]
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        # The cube's fingerprint changes with every ingested batch
+        return f"{self.cube.get('fingerprint')}:{CODE_VERSION}"
+
+    def parse(self, target):
+        """Split a request target into (route, selections, route params) with sorted, canonical values."""
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        selections = {key: sorted(params.pop(key)) for key in list(params) if key in FILTERS}
+        return url.path.rstrip("/") or "/", selections, params
+
+    def etag(self, route, selections, params):
+        canonical = json.dumps([self.version, route, selections, sorted(params.items())], ensure_ascii=False)
+        return '"' + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32] + '"'
+
+    def body(self, etag, route, selections, params):
+        with self._lock:
+            if etag in self._responses:
+                self._responses.move_to_end(etag)
+                return self._responses[etag]
+        result = ROUTES[route](CubeView(self.cube, selections), params)
+        body = json.dumps({"filters": selections, "data": _jsonable(result)}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._responses[etag] = body
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return body
+
+    def export(self, fmt, selections):
+        """Byte chunks of the filtered rows in `fmt`, read through the filter index (no filtered copy)."""
+        stream, _ = EXPORT_FORMATS[fmt]
+        df, index = self.live["rows"]  # one consistent pair, even while a batch is being ingested
+        return stream(df, filter_mask(index, selections, len(df)))
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route, selections, params = service.parse(self.path)
+            fmt = route.removeprefix("/export.")
+            if route.startswith("/export.") and fmt in EXPORT_FORMATS and service.df is not None:
+                return self._stream(fmt, selections)
+            if route not in ROUTES:
+                return self._send(404, {"error": f"unknown endpoint '{route}'", "endpoints": sorted(ROUTES)})
+
+            etag = service.etag(route, selections, params)
+            if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+                return self._send(304, None, etag)
+            try:
+                body = service.body(etag, route, selections, params)
+            except KeyError as exc:  # str() would quote the message
+                return self._send(400, {"error": exc.args[0]})
+            except ValueError as exc:
+                return self._send(400, {"error": str(exc)})
+            self._send(200, body, etag)
+
+        def _send(self, status, payload, etag=None):
+            body = payload if isinstance(payload, bytes) or payload is None else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"max-age={MAX_AGE}")
+            if body is not None:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body is not None:
+                self.wfile.write(body)
+
+        def _stream(self, fmt, selections):
+            # No Content-Length: the body ends when the connection closes
+            self.send_response(200)
+            self.send_header("Content-Type", EXPORT_FORMATS[fmt][1])
+            self.send_header("Content-Disposition", f'attachment; filename="respondents.{fmt}"')
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for chunk in service.export(fmt, selections):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away mid-download
+
+        def log_message(self, format, *args):
+            logger.info("%s %s", self.address_string(), format % args)
+
+    return Handler
+
+
+def load_service(path=DATA_PATH):
+    """The dashboard's data as app.py loads it: dataset, cube, filter index, then batches (watched)."""
+    df = clean_dataset(read_dataset(path))
+    live = ingest.live_dataset(df, build_filter_index(df), open_cube(df, default_store(), fingerprint(path)), path)
+    ingest.refresh(live)
+    ingest.start(live)
+    return AggregateService(live)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    service = load_service()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    endpoints = sorted(ROUTES) + [f"/export.{fmt}" for fmt in EXPORT_FORMATS]
+    print(f"Serving aggregates on http://{args.host}:{args.port} ({', '.join(endpoints)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
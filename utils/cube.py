@@ -0,0 +1,353 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.filters import FILTERS, encode, filter_values, merge_labels
+from utils.perf import span
+from utils.store import make_key
+
+# Numeric measures carried as (sum, non-null count) so means stay exact after re-aggregation
+MEASURES = {
+    "spend": "depense_mensuelle_culturelle",
+    "age": "age",
+}
+
+# Chart dimensions that are not filters, grouped by the charts that need them together.
+# Every table is pre-aggregated over all filter dimensions plus its own dimensions.
+TABLES = [
+    (),
+    ("frequence_internet",),
+    ("frequence_conso_culturelle",),
+    ("type_conso_legale_ou_illegale",),
+    ("frequence_conso_culturelle", "type_conso_legale_ou_illegale"),
+    ("utilisation_vpn",),
+    ("utilisation_applis_crackees",),
+    ("utilisation_telechargement_streaming",),
+    ("gratuit_ou_payant",),
+    ("acces_services_payants",),
+    ("taille_foyer",),
+    ("statut_foyer",),
+]
+
+# Room for every page query under every region x gender state (see utils.warmup)
+MEMO_SIZE = 4096
+
+
+def _measure_columns():
+    return ["count"] + [f"{name}_{part}" for name in MEASURES for part in ("sum", "n")]
+
+
+def _decode(ids, radices):
+    """Split mixed-radix ids back into one digit array per (name, radix), most significant first."""
+    digits = {}
+    for name, radix in reversed(radices):
+        digits[name] = ids % radix
+        ids = ids // radix
+    return digits
+
+
+def build_cube(df):
+    """
+    Pre-aggregate counts and measure sums per (filter values, chart dimension) cell.
+    Queries then re-aggregate cells instead of grouping raw rows.
+    """
+    codes, labels = {}, {}
+    slices = [key for key, (column, _) in FILTERS.items() if column in df.columns]
+    for key in slices:
+        codes[key], labels[key] = encode(filter_values(df, key))
+
+    dims = sorted({dim for table in TABLES for dim in table if dim in df.columns})
+    for dim in dims:
+        codes[dim], labels[dim] = encode(df[dim])
+
+    measures = {}
+    for name, column in MEASURES.items():
+        values = pd.to_numeric(df[column], errors="coerce") if column in df.columns else pd.Series(np.nan, index=df.index)
+        measures[f"{name}_sum"] = values.fillna(0).to_numpy(dtype="float64")
+        measures[f"{name}_n"] = values.notna().to_numpy(dtype="float64")
+
+    # Collapse the filter dimensions into one cell id per row (mixed radix, missing -> 0)
+    slice_key, slice_size = np.zeros(len(df), dtype=np.int64), 1
+    for key in slices:
+        slice_key = slice_key * (len(labels[key]) + 1) + (codes[key] + 1)
+        slice_size *= len(labels[key]) + 1
+    slice_cells = np.flatnonzero(np.bincount(slice_key, minlength=slice_size))
+    remap = np.zeros(slice_size, dtype=np.int64)
+    remap[slice_cells] = np.arange(len(slice_cells))
+    slice_ids = remap[slice_key]
+    slice_columns = _decode(slice_cells, [(key, len(labels[key]) + 1) for key in slices])
+
+    tables = {}
+    for table in TABLES:
+        if not all(dim in dims for dim in table):
+            continue
+        # Cell id = (filter cell, chart dims...) so one bincount per measure aggregates every cell
+        key, size = slice_ids, len(slice_cells)
+        for dim in table:
+            key = key * (len(labels[dim]) + 1) + (codes[dim] + 1)
+            size *= len(labels[dim]) + 1
+        counts = np.bincount(key, minlength=size)
+        cells = np.flatnonzero(counts)
+
+        digits = _decode(cells, [("_slice", len(slice_cells))] + [(dim, len(labels[dim]) + 1) for dim in table])
+        slice_id = digits.pop("_slice")
+        frame = {name: (column[slice_id] - 1).astype(np.int16) for name, column in slice_columns.items()}
+        frame.update({dim: (digits[dim] - 1).astype(np.int16) for dim in table})
+        frame["count"] = counts[cells].astype(np.int64)
+        for name, values in measures.items():
+            frame[name] = np.bincount(key, weights=values, minlength=size)[cells]
+        tables[table] = pd.DataFrame(frame)
+
+    return attach({
+        "slices": slices,
+        "labels": labels,
+        "positions": {name: {label: i for i, label in enumerate(values)} for name, values in labels.items()},
+        "tables": tables,
+        "rows": len(df),
+    })
+
+
+# Per-process state that is never pickled (to disk or to warm-up workers)
+RUNTIME_KEYS = ("memo", "memo_sizes", "lock", "store", "fingerprint", "version")
+
+
+def attach(data, store=None, fingerprint=None):
+    """A queryable cube from portable data, with a fresh memo and an optional on-disk store."""
+    return dict(data, memo=OrderedDict(), memo_sizes={}, lock=threading.Lock(), store=store, fingerprint=fingerprint,
+                version=0)  # bumped by merge_cube
+
+
+def portable(cube):
+    """The cube's pre-aggregated data without its per-process memo, lock and store."""
+    return {key: value for key, value in cube.items() if key not in RUNTIME_KEYS}
+
+
+def open_cube(df, store, fingerprint):
+    """
+    Build the cube, or load it from the on-disk store when this dataset and code version
+    were aggregated before. Query results are then persisted to the store as well.
+    """
+    if store is None:
+        return build_cube(df)
+    key = make_key(fingerprint, "cube")
+    data = store.get(key)
+    if data is None:
+        data = portable(build_cube(df))
+        store.put(key, data)
+    return attach(data, store, fingerprint)
+
+
+def _recode(table, names, old_labels, new_labels):
+    """Re-express a table's codes against new label lists (missing stays -1)."""
+    changed = [name for name in names if old_labels[name] != new_labels[name]]
+    if changed:
+        table = table.copy()
+    for name in changed:
+        positions = {label: i for i, label in enumerate(new_labels[name])}
+        remap = np.array([positions[label] for label in old_labels[name]] + [-1], dtype=np.int16)
+        table[name] = remap[table[name].to_numpy()]  # code -1 picks the trailing -1
+    return table
+
+
+def _cell_keys(table, names, labels):
+    """One int64 id per cell (mixed radix over the codes, as in build_cube)."""
+    key = np.zeros(len(table), dtype=np.int64)
+    for name in names:
+        key = key * (len(labels[name]) + 1) + (table[name].to_numpy() + 1)
+    return key
+
+
+def _add_cells(table, cells, names, labels):
+    """`table` plus `cells` (same columns): matching cells are summed, new ones appended."""
+    keys, new_keys = _cell_keys(table, names, labels), _cell_keys(cells, names, labels)
+    order = np.argsort(keys, kind="stable")
+    at = np.minimum(np.searchsorted(keys, new_keys, sorter=order), len(keys) - 1)
+    found = keys[order[at]] == new_keys if len(keys) else np.zeros(len(cells), dtype=bool)
+    rows = order[at[found]]  # cells are unique within each table, so no row is hit twice
+
+    table = table.copy()
+    for column in _measure_columns():
+        values = table[column].to_numpy().copy()
+        values[rows] += cells[column].to_numpy()[found]
+        table[column] = values
+    return pd.concat([table, cells[~found]], ignore_index=True)
+
+
+def merge_cube(cube, df, fingerprint=None):
+    """
+    Fold new (cleaned) rows into the cube in place. The rows are aggregated on their own
+    and their cells added to the existing ones, so the cost follows the batch and the
+    number of cells, never the rows already aggregated. Memoized results are dropped.
+    """
+    batch = build_cube(df)
+    labels = {
+        name: merge_labels(name, values, batch["labels"].get(name, []))
+        for name, values in cube["labels"].items()
+    }
+    tables = {}
+    for dims, table in cube["tables"].items():
+        names = cube["slices"] + list(dims)
+        tables[dims] = _recode(table, names, cube["labels"], labels)
+        if dims in batch["tables"]:
+            cells = _recode(batch["tables"][dims], names, batch["labels"], labels)
+            tables[dims] = _add_cells(tables[dims], cells, names, labels)
+
+    with cube["lock"]:
+        cube.update(
+            labels=labels,
+            positions={name: {label: i for i, label in enumerate(values)} for name, values in labels.items()},
+            tables=tables,
+            rows=cube["rows"] + len(df),
+            version=cube["version"] + 1,
+            fingerprint=fingerprint if fingerprint is not None else cube["fingerprint"],
+        )
+        cube["memo"].clear()
+        cube["memo_sizes"].clear()
+    return cube
+
+
+def _freeze(selections):
+    return tuple(sorted((key, tuple(values)) for key, values in selections.items() if values))
+
+
+def _cell_mask(all_positions, table, selections):
+    """Vectorized lookup-table test of every cell against the selections."""
+    keep = np.ones(len(table), dtype=bool)
+    for key, values in selections.items():
+        if not values or key not in all_positions:
+            continue
+        positions = all_positions[key]
+        # Slot 0 holds missing values (code -1)
+        lookup = np.zeros(len(positions) + 1, dtype=bool)
+        for value in values:
+            if value in positions:
+                lookup[positions[value] + 1] = True
+        keep &= lookup[table[key].to_numpy() + 1]
+    return keep
+
+
+def memo_key(by, selections):
+    return tuple(by), _freeze(selections)
+
+
+def remember(cube, key, result, persist=False, version=None):
+    """
+    Store a query result in the cube's LRU memo (also used to prime it from outside).
+    Results computed from an older `version` of the cube (before a merge) are dropped.
+    """
+    with cube["lock"]:
+        if version is not None and cube["version"] != version:
+            return
+        fingerprint = cube["fingerprint"]
+    if persist and cube.get("store") is not None:
+        cube["store"].put(make_key(fingerprint, "query", key), result)
+    size = int(result.memory_usage(deep=True).sum())
+    with cube["lock"]:
+        if version is not None and cube["version"] != version:
+            return
+        cube["memo"][key] = result
+        cube["memo"].move_to_end(key)
+        cube["memo_sizes"][key] = size
+        while len(cube["memo"]) > MEMO_SIZE:
+            _evict(cube)
+
+
+def _evict(cube):
+    key, _ = cube["memo"].popitem(last=False)
+    return cube["memo_sizes"].pop(key, 0)
+
+
+def memo_bytes(cube):
+    """Memory held by the cube's memoized query results."""
+    with cube["lock"]:
+        return sum(cube["memo_sizes"].values())
+
+
+def evict_coldest(cube):
+    """Drop the least recently used memoized result; returns the bytes freed (0 when empty)."""
+    with cube["lock"]:
+        return _evict(cube) if cube["memo"] else 0
+
+
+def query(cube, by, selections):
+    """
+    Counts and measure sums for the cells matching `selections`, grouped by `by`
+    (filter keys or chart columns). Results are memoized per (by, selections).
+    """
+    by = tuple(by)
+    key = memo_key(by, selections)
+    with cube["lock"]:
+        if key in cube["memo"]:
+            cube["memo"].move_to_end(key)
+            return cube["memo"][key]
+        # One consistent snapshot, should a merge swap the cube's data meanwhile
+        version, fingerprint = cube["version"], cube["fingerprint"]
+        tables, positions, labels = cube["tables"], cube["positions"], cube["labels"]
+
+    store = cube.get("store")
+    if store is not None:
+        with span("aggregate.disk", by="/".join(by)):
+            result = store.get(make_key(fingerprint, "query", key))
+        if result is not None:
+            remember(cube, key, result, version=version)
+            return result
+
+    with span("aggregate", by="/".join(by)):
+        table = tables[tuple(dim for dim in by if dim not in cube["slices"])]
+        cells = table[_cell_mask(positions, table, selections)]
+        if by:
+            result = cells.groupby(list(by), sort=True)[_measure_columns()].sum().reset_index()
+            for dim in by:
+                values = np.array(labels[dim] + [np.nan], dtype=object)
+                result[dim] = values[result[dim].to_numpy()]  # code -1 picks the trailing NaN
+        else:
+            result = cells[_measure_columns()].sum().to_frame().T
+
+    remember(cube, key, result, persist=True, version=version)
+    return result
+
+
+class CubeView:
+    """The cube seen through the active selections; sections read chart data from it."""
+
+    def __init__(self, cube, selections):
+        self.cube = cube
+        self.selections = selections
+
+    def options(self, key):
+        return self.cube["labels"].get(key, [])
+
+    def total(self, measure=None):
+        """Respondent count, or the mean of a measure, for the selection."""
+        row = query(self.cube, (), self.selections).iloc[0]
+        if measure is None:
+            return int(row["count"])
+        n = row[f"{measure}_n"]
+        return row[f"{measure}_sum"] / n if n else np.nan
+
+    def counts(self, *by, dropna=True, sort=True):
+        """DataFrame of `by` columns plus Count, most frequent first (like value_counts)."""
+        result = query(self.cube, by, self.selections)
+        if dropna:
+            result = result.dropna(subset=list(by))
+        result = result[list(by) + ["count"]].rename(columns={"count": "Count"})
+        result = result[result["Count"] > 0]
+        if sort:
+            result = result.sort_values("Count", ascending=False, kind="stable")
+        return result.reset_index(drop=True)
+
+    def mean(self, by, measure):
+        """
+        DataFrame of `by` plus the mean of `measure` as `<measure>_mean` (distinct from `by`,
+        even for the mean age by age band), skipping groups without values.
+        """
+        result = query(self.cube, (by,), self.selections).dropna(subset=[by])
+        result = result[result[f"{measure}_n"] > 0]
+        result[f"{measure}_mean"] = result[f"{measure}_sum"] / result[f"{measure}_n"]
+        return result[[by, f"{measure}_mean"]].reset_index(drop=True)
+
+    def mode(self, by):
+        counts = self.counts(by)
+        return counts[by].iloc[0] if len(counts) else None
@@ -0,0 +1,69 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 20_000  # ~30 MB peak per CSV chunk, whatever the export size
+
+
+def iter_chunks(df, mask, chunk_rows=CHUNK_ROWS):
+    """
+    Filtered rows of `df`, one block of source rows at a time: only the current chunk
+    is ever copied, never the whole selection (mask None = every row).
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        if mask is not None:
+            chunk = chunk[mask[start:start + chunk_rows]]
+        if len(chunk):
+            yield chunk
+
+
+def iter_csv(df, mask, chunk_rows=CHUNK_ROWS):
+    """UTF-8 CSV bytes of the filtered rows, header first."""
+    yield df.iloc[:0].to_csv(index=False).encode("utf-8")
+    for chunk in iter_chunks(df, mask, chunk_rows):
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+
+def iter_parquet(df, mask, chunk_rows=CHUNK_ROWS):
+    """Parquet bytes of the filtered rows, one row group per chunk, flushed as each is written."""
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    sink = _Sink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for chunk in iter_chunks(df, mask, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()  # footer
+
+
+class _Sink:
+    """Write-only stream that hands its bytes out as they come but keeps absolute offsets for the footer."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts, self.position = [], 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+# Format -> (byte stream, content type)
+FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "parquet": (iter_parquet, "application/vnd.apache.parquet"),
+}
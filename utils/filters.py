@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Sidebar filters: key -> (source column, label)
+FILTERS = {
+    "region": ("region", "Region"),
+    "gender": ("sexe", "Gender"),
+    "age": ("age", "Age Band"),
+    "agglomeration": ("type_agglomeration", "Agglomeration Type"),
+    "employment": ("statut_emploi", "Employment Status"),
+    "spending": ("depense_mensuelle_culturelle", "Spending Bracket"),
+}
+
+AGE_BINS = [15, 25, 35, 45, 55, 65, np.inf]
+AGE_LABELS = ["15–24", "25–34", "35–44", "45–54", "55–64", "65+"]
+
+SPENDING_BINS = [0, 10, 30, 60, 100, np.inf]
+SPENDING_LABELS = ["€0–10", "€10–30", "€30–60", "€60–100", "€100+"]
+
+# Filters whose values are fixed, ordered bands rather than the sorted values found in the data
+BANDS = {"age": AGE_LABELS, "spending": SPENDING_LABELS}
+
+
+def _bucket(values, bins, labels):
+    """pd.cut(..., right=False) equivalent built on searchsorted, which stays fast at 10M+ rows."""
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+    codes = np.searchsorted(bins, numbers, side="right") - 1
+    codes[(codes < 0) | (codes >= len(labels))] = -1  # below the first edge, last edge, NaN
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels, ordered=True), index=values.index)
+
+
+def age_bands(ages):
+    """Bucket numeric ages into the ordered bands used by the age filter."""
+    return _bucket(ages, AGE_BINS, AGE_LABELS)
+
+
+def spending_brackets(spend):
+    """Bucket monthly spending (€) into the brackets of the spending donut."""
+    return _bucket(spend, SPENDING_BINS, SPENDING_LABELS)
+
+
+def filter_values(df, key):
+    """Return the Series a filter key selects on (age and spending are bucketed)."""
+    column = FILTERS[key][0]
+    if key == "age":
+        return age_bands(df[column])
+    if key == "spending":
+        return spending_brackets(df[column])
+    return df[column]
+
+
+def encode(values):
+    """Integer codes (-1 = missing) and ordered labels shared by the filter index and the cube."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Already coded (bands, columnar sources): reuse the codes, dropping unused categories
+        codes = values.cat.codes.to_numpy()
+        present = np.bincount(codes + 1, minlength=len(values.cat.categories) + 1)[1:] > 0
+        remap = np.full(len(present) + 1, -1, dtype=codes.dtype)  # last slot keeps -1 as missing
+        remap[:-1][present] = np.arange(present.sum())
+        return remap[codes], list(values.cat.categories[present])
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, list(uniques)
+
+
+def merge_labels(key, old, new):
+    """
+    Union of two label lists in the order encode() would give the combined data:
+    band order for the bands, sorted otherwise (new labels appended if they do not compare).
+    """
+    added = [label for label in new if label not in set(old)]
+    if not added:
+        return list(old)
+    if key in BANDS:
+        present = set(old) | set(added)
+        return [label for label in BANDS[key] if label in present]
+    try:
+        return sorted(old + added)
+    except TypeError:
+        return list(old) + added
+
+
+def build_filter_index(df):
+    """
+    Precompute one boolean row mask per (filter, value).
+    Built once per dataset so reruns only combine masks, never rescan columns.
+    """
+    index = {}
+    for key, (column, _) in FILTERS.items():
+        if column not in df.columns:
+            continue
+        codes, labels = encode(filter_values(df, key))
+        index[key] = {value: codes == i for i, value in enumerate(labels)}
+    return index
+
+
+def extend_filter_index(index, df, n_old):
+    """
+    The filter index of `index`'s rows followed by the `df` rows. Masks live in buffers grown
+    by an eighth at a time, so appending a batch writes only its own rows (the previous masks
+    stay valid for readers holding them); values first seen in the batch are False before it.
+    """
+    n_new = n_old + len(df)
+    extended = {}
+    for key, (column, _) in FILTERS.items():
+        if column not in df.columns:
+            continue
+        codes, labels = encode(filter_values(df, key))
+        masks = index.get(key, {})
+        values = merge_labels(key, list(masks), labels)
+        positions = {value: i for i, value in enumerate(labels)}
+        extended[key] = {}
+        for value in values:
+            mask = masks.get(value)
+            buffer = mask.base if mask is not None and mask.base is not None else mask
+            if buffer is None or len(buffer) < n_new:
+                grown = np.zeros(max(n_new, n_old + n_old // 8), dtype=bool)
+                if mask is not None:
+                    grown[:n_old] = mask
+                buffer = grown
+            buffer[n_old:n_new] = codes == positions[value] if value in positions else False
+            extended[key][value] = buffer[:n_new]
+    return extended
+
+
+def filter_options(index, key):
+    """Values offered by a filter, in index order."""
+    return list(index.get(key, {}))
+
+
+def filter_mask(index, selections, n_rows):
+    """
+    Combine the selected per-value masks: OR within a filter, AND across filters.
+    Returns None when nothing is selected (all rows kept).
+    """
+    mask = None
+    for key, values in selections.items():
+        if not values or key not in index:
+            continue
+        value_masks = index[key]
+        selected = np.zeros(n_rows, dtype=bool)
+        for value in values:
+            if value in value_masks:
+                selected |= value_masks[value]
+        mask = selected if mask is None else mask & selected
+    return mask
+
+
+# --------------------------
+# Cross-filtering (chart clicks)
+# --------------------------
+def _normalize(value):
+    return str(value).replace("’", "'").strip()
+
+
+def _clicked_value(point, options):
+    """Find which filter option a clicked Plotly point refers to."""
+    candidates = []
+    customdata = point.get("customdata")
+    if isinstance(customdata, (list, tuple)) and customdata:
+        candidates.append(customdata[0])
+    elif customdata is not None:
+        candidates.append(customdata)
+    candidates += [point.get(field) for field in ("location", "label", "x", "y")]
+
+    by_norm = {_normalize(option): option for option in options}
+    for candidate in candidates:
+        if candidate is not None and _normalize(candidate) in by_norm:
+            return by_norm[_normalize(candidate)]
+    return None
+
+
+def cross_filter(chart_key, filter_key, options):
+    """
+    st.plotly_chart kwargs that turn a click on a chart element into a page-wide filter.
+    Clicking the only selected value again clears the filter.
+    """
+    def on_click():
+        event = st.session_state.get(chart_key) or {}
+        points = (event.get("selection") or {}).get("points") or []
+        if not points:
+            return
+        value = _clicked_value(points[0], options)
+        if value is None:
+            return
+        state_key = f"filter_{filter_key}"
+        current = st.session_state.get(state_key) or []
+        st.session_state[state_key] = [] if current == [value] else [value]
+
+    return {"on_select": on_click, "selection_mode": "points"}
@@ -0,0 +1,124 @@
+import glob
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils import memory
+from utils.cube import merge_cube
+from utils.filters import extend_filter_index, merge_labels
+from utils.io import DATA_PATH, clean_dataset, read_dataset
+from utils.store import fingerprint
+
+# New respondent batches dropped next to the dataset (data/data-2025-06-01.csv, ...), or DASHBOARD_BATCHES=<glob>
+BATCH_PATTERN = os.environ.get("DASHBOARD_BATCHES", "")
+BATCH_SUFFIXES = (".xlsx", ".csv", ".parquet")
+# DASHBOARD_INGEST_SECONDS: how often the watcher looks for new batches (0 = only at startup)
+POLL_SECONDS = float(os.environ.get("DASHBOARD_INGEST_SECONDS", "5"))
+# Files modified more recently than this may still be being written
+SETTLE_SECONDS = 2
+
+logger = logging.getLogger("dashboard.ingest")
+
+
+def batch_files(path=DATA_PATH, pattern=BATCH_PATTERN):
+    """Batch files to ingest, in name order (date-stamped names ingest oldest first)."""
+    pattern = pattern or f"{os.path.splitext(path)[0]}-*"
+    return sorted(name for name in glob.glob(pattern) if name.endswith(BATCH_SUFFIXES))
+
+
+def live_dataset(df, index, cube, path=DATA_PATH):
+    """
+    The shared dataset that batches are appended to. Readers take `live["rows"]`,
+    a (DataFrame, filter index) pair swapped as a whole, and query the cube, merged in place.
+    Batches are looked for next to `path`.
+    """
+    return {"rows": (df, index), "cube": cube, "batches": {}, "lock": threading.Lock(), "path": path}
+
+
+def _align(batch, df):
+    """
+    (batch, dataset) with the same columns and dtypes, so appending keeps the dataset's dtypes.
+    Categorical columns (columnar sources) take the union of both sides' categories, ordered
+    like merge_labels: only their codes are remapped, never turned into strings.
+    """
+    batch = batch.reindex(columns=df.columns)
+    widened = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = merge_labels(column, list(dtype.categories), list(pd.unique(batch[column].dropna())))
+            if categories != list(dtype.categories):
+                dtype = widened[column] = pd.CategoricalDtype(categories, ordered=dtype.ordered)
+            batch[column] = batch[column].astype(dtype)
+        elif pd.api.types.is_numeric_dtype(dtype):
+            batch[column] = pd.to_numeric(batch[column], errors="coerce").astype(dtype)
+    return batch, df.astype(widened) if widened else df
+
+
+def ingest(live, batch, stamp):
+    """
+    Append cleaned rows: their cells are merged into the cube and their rows into the
+    filter index, so the work follows the batch size (the DataFrame itself is still copied).
+    """
+    df, index = live["rows"]
+    batch, df = _align(batch, df)
+    index = extend_filter_index(index, batch, len(df))
+    df = pd.concat([df, batch], ignore_index=True)
+    merge_cube(live["cube"], batch, f"{live['cube']['fingerprint']}+{stamp}")
+    live["rows"] = (df, index)
+
+    memory.register_fixed("dataset", df)
+    memory.register_fixed("filter_index", index)
+    memory.register_fixed("cube", live["cube"]["tables"])
+    return len(batch)
+
+
+def refresh(live, paths=None):
+    """Ingest the batch files not seen yet; returns the number of rows added."""
+    added = 0
+    with live["lock"]:
+        for path in batch_files(live["path"]) if paths is None else paths:
+            try:
+                stamp = fingerprint(path)
+                settling = time.time() - os.stat(path).st_mtime < SETTLE_SECONDS
+            except OSError:
+                continue  # removed meanwhile
+            if path in live["batches"]:
+                if live["batches"][path] != stamp:
+                    live["batches"][path] = stamp
+                    logger.warning("batch %s changed after it was ingested; restart to reload it", path)
+                continue
+            if settling:
+                continue  # still being written: next poll
+            try:
+                batch = clean_dataset(read_dataset(path))
+            except Exception:  # unreadable for now: retried next poll
+                logger.exception("could not read batch %s", path)
+                continue
+            start = time.perf_counter()
+            rows = ingest(live, batch, stamp)
+            live["batches"][path] = stamp
+            added += rows
+            logger.info("ingested %s: %d rows in %.2fs", path, rows, time.perf_counter() - start)
+    return added
+
+
+def start(live, interval=POLL_SECONDS):
+    """Poll for new batches on a background thread (None when polling is disabled)."""
+    if not interval:
+        return None
+    thread = threading.Thread(target=_watch, args=(live, interval), name="dashboard-ingest", daemon=True)
+    thread.start()
+    return thread
+
+
+def _watch(live, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            refresh(live)
+        except Exception:  # a failed batch must not stop the watcher
+            logger.exception("batch ingestion failed")
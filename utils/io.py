@@ -1,14 +1,40 @@
+import json
+import os
+from urllib.request import urlopen
+
 import pandas as pd
 import streamlit as st
 
-@st.cache_data(show_spinner="Loading dataset...", ttl=3600)
+from utils.perf import span
+
+# Dataset to serve: the survey workbook, or a columnar (.parquet) file such as a synthetic scale-up
+DATA_PATH = os.environ.get("DASHBOARD_DATA", "data/data.xlsx")
+
+GEOJSON_URL = "https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/regions.geojson"
+
+def read_dataset(path):
+    """Read the raw dataset from an Excel workbook, a Parquet or a CSV file."""
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    if str(path).endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+@st.cache_resource(show_spinner="Loading dataset...", ttl=3600)
 def load_data():
     """
     Loads and preprocesses the dataset.
     Cached for fast reloading when filters are changed.
     """
-    df = pd.read_excel("data/data.xlsx")
+    with span("load_data.read"):
+        df = read_dataset(DATA_PATH)
+    with span("load_data.clean"):
+        return clean_dataset(df)
+
 
+def clean_dataset(df):
+    """Column, category and dtype cleaning shared by every loader."""
     # Clean column names
     df.columns = df.columns.str.strip()
 
@@ -19,10 +45,14 @@ def load_data():
     # Clean categorical columns
     for col in ["region", "sexe"]:
         if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Columnar sources: strip the categories, not every row
+                df[col] = df[col].cat.rename_categories(lambda value: str(value).strip())
+            else:
+                df[col] = df[col].astype(str).str.strip()
 
     # 🧹 Fix 'age' properly
-    if "age" in df.columns:
+    if "age" in df.columns and not pd.api.types.is_numeric_dtype(df["age"]):
         # Remove all non-numeric characters (like "ans")
         df["age"] = df["age"].astype(str).str.extract(r"(\d+)")[0]
         # Convert to numeric (coerce invalid)
@@ -33,3 +63,20 @@ def load_data():
     df[num_cols] = df[num_cols].astype("float32")
 
     return df
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 3600)
+def _fetch_geojson():
+    with urlopen(GEOJSON_URL, timeout=10) as response:
+        return json.load(response)
+
+
+def load_geojson():
+    """
+    French regions GeoJSON, fetched once and cached instead of on every rerun.
+    Returns None when it cannot be downloaded (failures are not cached).
+    """
+    try:
+        return _fetch_geojson()
+    except OSError:
+        return None
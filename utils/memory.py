@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# DASHBOARD_MEMORY_MB caps cached artifacts + live session data (0 = account only, never evict)
+BUDGET_MB = float(os.environ.get("DASHBOARD_MEMORY_MB", "0"))
+# Reruns that stopped before release_session() (an exception) stop counting after this long
+SESSION_TTL = 600
+
+_lock = threading.Lock()
+_caches = {}  # name -> (size(), evict_coldest() -> bytes freed)
+_sessions = {}  # session id -> {"bytes", "peak", "seen", "artifacts"}; bytes is 0 between reruns
+_evictions = {"entries": 0, "bytes": 0}
+
+
+def nbytes(obj):
+    """Approximate memory held by a cached or per-session artifact."""
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(value) for value in obj)
+    return 0
+
+
+def register_cache(name, size, evict_coldest):
+    """Account for a cache and let the budget evict its coldest entries (re-registering replaces it)."""
+    with _lock:
+        _caches[name] = (size, evict_coldest)
+
+
+def register_fixed(name, obj):
+    """Account for a shared artifact that is never evicted (sized once)."""
+    size = nbytes(obj)
+    register_cache(name, lambda: size, lambda: 0)
+
+
+def track_session(**artifacts):
+    """
+    Record what the current session materialized for this rerun (e.g. its filtered rows).
+    It counts until release_session(): nothing of it outlives the script run.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return 0
+    sizes = {name: nbytes(obj) for name, obj in artifacts.items()}
+    total = sum(sizes.values())
+    with _lock:
+        previous = _sessions.get(ctx.session_id, {})
+        _sessions[ctx.session_id] = {
+            "bytes": total,
+            "peak": max(total, previous.get("peak", 0)),
+            "seen": time.monotonic(),
+            "artifacts": sizes,
+        }
+    return total
+
+
+def evict_all():
+    """Empty every cache (benchmarks time cold reruns this way); returns the bytes freed."""
+    freed = 0
+    with _lock:
+        for _, evict_coldest in _caches.values():
+            while released := evict_coldest():
+                freed += released
+    return freed
+
+
+def release_session():
+    """End of the current session's rerun: its artifacts are garbage once the script returns."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    with _lock:
+        usage = _sessions.get(ctx.session_id)
+        if usage is not None:
+            usage["bytes"] = 0
+            usage["seen"] = time.monotonic()
+
+
+def _live_sessions():
+    cutoff = time.monotonic() - SESSION_TTL
+    for session_id in [sid for sid, usage in _sessions.items() if usage["seen"] < cutoff]:
+        del _sessions[session_id]
+    return _sessions
+
+
+def totals():
+    """Bytes per cache, per live session and overall, with the budget and evictions so far."""
+    with _lock:
+        caches = {name: size() for name, (size, _) in _caches.items()}
+        sessions = {sid: usage["bytes"] for sid, usage in _live_sessions().items() if usage["bytes"]}
+        evictions = dict(_evictions)
+    return {
+        "caches": caches,
+        "sessions": sessions,
+        "total": sum(caches.values()) + sum(sessions.values()),
+        "budget": int(BUDGET_MB * 1024 * 1024),
+        "evictions": evictions,
+    }
+
+
+def enforce():
+    """Evict the coldest entries of the largest cache until caches + sessions fit the budget."""
+    budget = int(BUDGET_MB * 1024 * 1024)
+    if not budget:
+        return 0
+    freed = 0
+    with _lock:
+        sizes = {name: size() for name, (size, _) in _caches.items()}
+        overflow = sum(sizes.values()) + sum(u["bytes"] for u in _live_sessions().values()) - budget
+        while overflow > 0 and sizes:
+            name = max(sizes, key=sizes.get)
+            released = _caches[name][1]()
+            if not released:
+                del sizes[name]  # nothing left to evict there
+                continue
+            sizes[name] -= released
+            overflow -= released
+            freed += released
+            _evictions["entries"] += 1
+            _evictions["bytes"] += released
+    return freed
+
+
+def render_panel():
+    """Sidebar breakdown of process memory attributed to caches and sessions."""
+    usage = totals()
+    ctx = get_script_run_ctx()
+    mine = _sessions.get(ctx.session_id if ctx else None, {})
+    mb = 1024 * 1024
+    with st.sidebar.expander("Memory", expanded=False):
+        st.metric("Accounted (MB)", f"{usage['total'] / mb:.1f}",
+                  help=f"Budget: {usage['budget'] / mb:.0f} MB" if usage["budget"] else "No budget set")
+        st.caption(
+            f"This session: {mine.get('bytes', 0) / mb:.1f} MB (peak {mine.get('peak', 0) / mb:.1f} MB) · "
+            f"{len(usage['sessions'])} rerun(s) in flight · {usage['evictions']['entries']} eviction(s)"
+        )
+        rows = [{"owner": f"cache: {name}", "MB": size / mb} for name, size in usage["caches"].items()]
+        rows += [{"owner": "sessions", "MB": sum(usage["sessions"].values()) / mb}]
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True, use_container_width=True)
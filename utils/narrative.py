@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.cube import memo_key, query
+from utils.perf import lap, span
+
+# Statistics quoted in the sections' narrative text. They read the aggregates the charts
+# were drawn from (chart_data frames or memoized view.counts results), so they follow the
+# active filters at no extra aggregation cost. Frames carry a "value" or "Count" column.
+
+# Said instead of a claim whose figures are undefined (NaN or "n/a": nobody to compute them on)
+NO_MATCH = "No respondents match this selection."
+
+STATS_CACHE_SIZE = 1024
+_stats = OrderedDict()
+_stats_lock = threading.Lock()
+
+
+def page_stats(view, compute):
+    """
+    compute(view) -> dict of a page's narrative numbers, run once per filter state:
+    later reruns in that state only look the dict up.
+    """
+    key = (compute.__module__, id(view.cube), view.cube.get("version"), memo_key((), view.selections))
+    with _stats_lock:
+        if key in _stats:
+            _stats.move_to_end(key)
+            return _stats[key]
+    with span("narrative", page=compute.__module__):
+        stats = compute(view)
+    lap()  # keep this out of the next chart's build time
+    with _stats_lock:
+        _stats[key] = stats
+        while len(_stats) > STATS_CACHE_SIZE:
+            _stats.popitem(last=False)
+    return stats
+
+
+def clear_stats():
+    """Forget every page's numbers (benchmarks time cold reruns this way)."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _weights(frame):
+    return frame["value"] if "value" in frame else frame["Count"]
+
+
+def missing(*values):
+    """True when any of these statistics is undefined, so no claim can rest on them."""
+    return any(value != value or value == "n/a" for value in values)
+
+
+def pct(value):
+    """'42%', or 'n/a' for an empty selection."""
+    return "n/a" if value != value else f"{value:.0f}%"
+
+
+def euros(value):
+    return "n/a" if value != value else f"€{value:.2f}"
+
+
+def share(frame, column, values, among=None):
+    """Percentage of the weight in rows whose `column` is in `values` (out of `among` rows, or all)."""
+    weights = _weights(frame).to_numpy(dtype="float64")
+    labels = frame[column]
+    total = weights[labels.isin(among).to_numpy()].sum() if among is not None else weights.sum()
+    return weights[labels.isin(values).to_numpy()].sum() / total * 100 if total else np.nan
+
+
+def rate(frame, column, value, group, keys):
+    """For each `group` value in `keys`, the percentage of its weight where `column` == `value`."""
+    return [share(frame[frame[group] == key], column, (value,)) for key in keys]
+
+
+def leaders(frame, column, n=3):
+    """The `n` largest groups as '**label** (x%)'."""
+    weights = _weights(frame)
+    total = weights.sum()
+    top = frame.assign(_w=weights).nlargest(n, "_w")
+    return [f"**{label}** ({pct(w / total * 100)})" for label, w in zip(top[column], top["_w"])]
+
+
+def listing(items):
+    """'a', 'a and b', 'a, b and c'."""
+    if not items:
+        return "n/a"
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def extremes(frame, column):
+    """((label, value) of the highest mean, (label, value) of the lowest) for a mean frame."""
+    if frame.empty:
+        return ("n/a", np.nan), ("n/a", np.nan)
+    values = frame.iloc[:, -1]
+    high, low = frame.loc[values.idxmax()], frame.loc[values.idxmin()]
+    return (high[column], high.iloc[-1]), (low[column], low.iloc[-1])
+
+
+def pooled_mean(view, by, measure, values):
+    """Mean of `measure` over the respondents whose `by` is in `values` (exact, from the cube cells)."""
+    rows = query(view.cube, (by,), view.selections)
+    rows = rows[rows[by].isin(values)]
+    n = rows[f"{measure}_n"].sum()
+    return rows[f"{measure}_sum"].sum() / n if n else np.nan
+
+
+def compare(a, b):
+    """How `a` compares with `b`, for the text: 'more than', 'less than' or 'about as much as'."""
+    if a != a or b != b or abs(a - b) <= 0.05 * max(abs(a), abs(b)):
+        return "about as much as"
+    return "more than" if a > b else "less than"
@@ -0,0 +1,30 @@
+"""
+The dashboard's pages, shared by app.py and the tools that render it headlessly
+through Streamlit's testing API (static site, chart export, benchmarks).
+"""
+import logging
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP = ROOT / "app.py"
+
+# Page -> section module; each section (and Plotly with it) is imported the first time its page is routed
+PAGES = {
+    "Overview": "intro",
+    "Audience Profile": "profile",
+    "Online Habits": "behavior",
+    "Cultural Economy": "spending",
+    "Key Findings": "insights",
+}
+
+
+def chart_key(element):
+    """Registry key of a rendered plotly_chart element (ids look like "$$ID-<hash>-<user key>")."""
+    return element.proto.id.split("-", 2)[-1]
+
+
+def headless():
+    """Set this process up to run app.py outside `streamlit run`."""
+    os.chdir(ROOT)  # the app loads data/ and assets/ relative to the repo root
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
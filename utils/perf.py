@@ -0,0 +1,121 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# DASHBOARD_PERF=1 times every rerun and logs it; ?perf=1 in the URL times one session and shows the panel
+ENV_ENABLED = os.environ.get("DASHBOARD_PERF", "") not in ("", "0")
+
+logger = logging.getLogger("dashboard.perf")
+if ENV_ENABLED and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_NOOP = nullcontext()
+_current = contextvars.ContextVar("perf_run", default=None)
+
+
+class _Span:
+    __slots__ = ("run", "name", "tags", "start")
+
+    def __init__(self, run, name, tags):
+        self.run, self.name, self.tags = run, name, tags
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run["spans"].append(_record(self.name, self.start, time.perf_counter(), self.tags))
+        return False
+
+
+def _record(name, start, end, tags):
+    return {"name": name, "ms": round((end - start) * 1000, 3), **tags}
+
+
+def span(name, **tags):
+    """Time a block for the current rerun; a shared no-op when timing is off."""
+    run = _current.get()
+    if run is None:
+        return _NOOP
+    return _Span(run, name, tags)
+
+
+def start_run(enabled, **tags):
+    """Begin collecting spans for this rerun (or disable collection). Returns the run or None."""
+    now = time.perf_counter()
+    run = None
+    if enabled:
+        ctx = get_script_run_ctx()
+        tags.setdefault("session", ctx.session_id if ctx else None)
+        run = {"tags": tags, "spans": [], "start": now, "lap": now}
+    _current.set(run)
+    return run
+
+
+def tag_run(**tags):
+    run = _current.get()
+    if run is not None:
+        run["tags"].update(tags)
+
+
+def plotly_chart(fig, key, **kwargs):
+    """
+    st.plotly_chart that records, per chart key, the time spent building it
+    (since the previous chart) and the time spent serializing it.
+    """
+    run = _current.get()
+    if run is None:
+        return st.plotly_chart(fig, key=key, **kwargs)
+
+    built = time.perf_counter()
+    run["spans"].append(_record("build", run["lap"], built, {"chart": key}))
+    try:
+        return st.plotly_chart(fig, key=key, **kwargs)
+    finally:
+        run["lap"] = time.perf_counter()
+        run["spans"].append(_record("serialize", built, run["lap"], {"chart": key}))
+
+
+def lap():
+    """Reset the chart lap timer (e.g. when a page starts rendering)."""
+    run = _current.get()
+    if run is not None:
+        run["lap"] = time.perf_counter()
+
+
+def finish_run(run):
+    """Close the rerun: add its total and emit one structured JSON log line per span."""
+    if run is None:
+        return None
+    run["spans"].append(_record("rerun", run["start"], time.perf_counter(), {}))
+    if logger.isEnabledFor(logging.INFO):
+        for record in run["spans"]:
+            logger.info(json.dumps({"event": "perf_span", "ts": time.time(), **run["tags"], **record}, ensure_ascii=False))
+    _current.set(None)
+    return run
+
+
+def render_panel(run):
+    """Sidebar breakdown of the last rerun's spans."""
+    if run is None:
+        return
+    import pandas as pd
+
+    spans = pd.DataFrame(run["spans"])
+    with st.sidebar.expander("Performance", expanded=False):
+        st.metric("Rerun (ms)", f"{spans['ms'].iloc[-1]:.1f}")
+        stages = spans[spans["name"] != "rerun"].groupby("name", sort=False)["ms"].sum().round(2)
+        st.dataframe(stages.rename("ms").reset_index(), hide_index=True, use_container_width=True)
+        if "chart" in spans:
+            charts = spans.dropna(subset=["chart"]).pivot_table(index="chart", columns="name", values="ms", aggfunc="sum")
+            st.dataframe(charts.round(2), use_container_width=True)
@@ -0,0 +1,219 @@
+"""
+Batch chart export across filter combinations.
+
+Renders every chart of the chosen pages for every combination of the chosen
+filters (each filter's values plus "All") with the dashboard's own section
+code, and writes each figure to one output directory as HTML and/or static
+images. Work is spread over a process pool; finished (page, state) tasks are
+recorded in manifest.jsonl with their formats as they complete, so a crashed or
+interrupted run resumes where it stopped, and a rerun asking for more formats
+only renders the missing ones.
+
+    python -m utils.report --out reports --filters region --formats html png
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+
+import plotly.io as pio
+
+from utils.filters import FILTERS
+from utils.pages import APP, PAGES, chart_key, headless
+
+IMAGE_FORMATS = ("png", "svg", "pdf")
+FORMATS = ("html",) + IMAGE_FORMATS
+
+_at = None
+
+
+def slug(text):
+    ascii_text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9A-Za-z]+", "-", ascii_text).strip("-").lower() or "x"
+
+
+def state_slug(state):
+    return "_".join(f"{key}-{slug(value)}" for key, value in state.items()) or "all"
+
+
+def task_id(page, state):
+    return f"{slug(page)}/{state_slug(state)}"
+
+
+def _write_atomic(path, write):
+    """Write through a temporary file so an interrupted run never leaves a partial output."""
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+# --------------------------
+# Worker side
+# --------------------------
+def _init_worker():
+    from streamlit.testing.v1 import AppTest
+
+    global _at
+    headless()
+    os.environ["DASHBOARD_WARMUP"] = "0"
+    _at = AppTest.from_file(str(APP), default_timeout=300)
+    _at.run()
+
+
+def sidebar_options(filters):
+    """Options of each filter as offered by the app's sidebar."""
+    return {key: list(_at.multiselect(key=f"filter_{key}").options) for key in filters}
+
+
+def render_task(out, page, state, formats):
+    """Render one page under one filter state and write every chart; returns the manifest record."""
+    _at.radio(key="main_navigation").set_value(page)
+    for key in FILTERS:
+        _at.multiselect(key=f"filter_{key}").set_value([state[key]] if key in state else [])
+    _at.run()
+    if _at.exception:
+        raise RuntimeError(f"{page} / {state}: {_at.exception[0].message}")
+
+    folder = out / task_id(page, state)
+    folder.mkdir(parents=True, exist_ok=True)
+    files = []
+    for element in _at.get("plotly_chart"):
+        chart = chart_key(element)
+        fig = pio.from_json(element.proto.spec)
+        for fmt in formats:
+            path = folder / f"{chart}.{fmt}"
+            if fmt == "html":
+                _write_atomic(path, lambda tmp: fig.write_html(tmp, include_plotlyjs="cdn", full_html=True))
+            else:
+                _write_atomic(path, lambda tmp: fig.write_image(tmp, format=fmt, scale=2))
+            files.append({"chart": chart, "format": fmt, "path": str(path.relative_to(out)), "bytes": path.stat().st_size})
+    return {"task": task_id(page, state), "page": page, "filters": state, "formats": list(formats), "files": files}
+
+
+# --------------------------
+# Driver
+# --------------------------
+def _ordered(formats):
+    return [fmt for fmt in FORMATS if fmt in formats]
+
+
+def _load_done(journal):
+    """
+    Tasks rendered by previous runs, each with the formats whose files are all still
+    present (a later record of a task supersedes earlier ones).
+    """
+    done = {}
+    if not journal.exists():
+        return done
+    out = journal.parent
+    for line in journal.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn last line after a crash
+        # Records without "formats" predate it: their files tell which formats were written
+        formats = set(record.get("formats") or (f["format"] for f in record["files"]))
+        formats -= {f["format"] for f in record["files"] if not (out / f["path"]).exists()}
+        record["formats"] = _ordered(formats)
+        record["files"] = [f for f in record["files"] if f["format"] in formats]
+        done[record["task"]] = record
+    return done
+
+
+def _missing_formats(done, task, formats):
+    have = done.get(task, {}).get("formats", ())
+    return [fmt for fmt in formats if fmt not in have]
+
+
+def _merge(previous, record):
+    """A task's record with the formats rendered earlier kept alongside the new ones."""
+    if previous is None:
+        return record
+    kept = [f for f in previous["files"] if f["format"] not in record["formats"]]
+    return dict(record, formats=_ordered(set(previous["formats"]) | set(record["formats"])), files=kept + record["files"])
+
+
+def export(out, pages, filters, formats, workers):
+    out.mkdir(parents=True, exist_ok=True)
+    journal = out / "manifest.jsonl"
+    done = _load_done(journal)
+
+    start = time.perf_counter()
+    failures = []
+    # Only workers run the app: AppTest installs app.py as __main__, which would break pickling here
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool, journal.open("a", encoding="utf-8") as log:
+        options = pool.submit(sidebar_options, filters).result()
+        states = [
+            {key: value for key, value in zip(filters, combo) if value is not None}
+            for combo in product(*([None] + options[key] for key in filters))
+        ]
+        # A task is done only when every requested format was written; otherwise render the missing formats
+        tasks = [
+            (page, state, missing)
+            for page in pages for state in states
+            if (missing := _missing_formats(done, task_id(page, state), formats))
+        ]
+        total = len(pages) * len(states)
+        print(f"{total} tasks, {total - len(tasks)} already done, {len(tasks)} to render on {workers} worker(s)")
+
+        futures = {pool.submit(render_task, out, page, state, missing): (page, state) for page, state, missing in tasks}
+        for n, future in enumerate(as_completed(futures), 1):
+            page, state = futures[future]
+            try:
+                record = future.result()
+            except Exception as exc:  # keep going: the task stays pending for the next run
+                failures.append(f"{task_id(page, state)}: {exc}")
+                continue
+            record = _merge(done.get(record["task"]), record)
+            done[record["task"]] = record
+            log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+            print(f"[{n}/{len(tasks)}] {record['task']} ({len(record['files'])} files)")
+
+    manifest = {
+        "pages": pages,
+        "filters": filters,
+        "formats": formats,
+        "tasks": sorted(done.values(), key=lambda record: record["task"]),
+    }
+    _write_atomic(out / "manifest.json", lambda tmp: tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8"))
+    print(f"done in {time.perf_counter() - start:.1f}s; manifest: {out / 'manifest.json'}")
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--out", type=Path, default=Path("reports"), help="output directory (re-run to resume)")
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=list(PAGES))
+    parser.add_argument("--filters", nargs="*", default=["region"], choices=list(FILTERS),
+                        help="filters to enumerate; each combination of their values (and All) is exported")
+    parser.add_argument("--formats", nargs="+", default=["html"], choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+
+    if any(fmt in IMAGE_FORMATS for fmt in args.formats):
+        try:
+            import kaleido  # noqa: F401  (Plotly's static image engine)
+        except ImportError:
+            parser.error("png/svg/pdf export needs the kaleido package (pip install kaleido)")
+
+    return export(args.out.resolve(), args.pages, args.filters, args.formats, args.workers)
+
+
+if __name__ == "__main__":
+    # Run through the importable module so workers unpickle utils.report.*, not __main__.*
+    # (inside a worker, AppTest replaces __main__ with app.py)
+    from utils.report import main
+
+    sys.exit(main())
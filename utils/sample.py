@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from utils.filters import encode
+
+# Approximate mode renders row-level charts from a stratified sample of about SAMPLE_ROWS rows
+SAMPLE_ROWS = int(os.environ.get("DASHBOARD_SAMPLE_ROWS", "50000"))
+# ... and is switched on by default from this many rows
+APPROX_ROWS = int(os.environ.get("DASHBOARD_APPROX_ROWS", "1000000"))
+
+STRATA = ("region", "sexe")
+MIN_PER_STRATUM = 30
+WEIGHT = "_weight"  # rows of the population each sampled row stands for
+
+
+def stratified_sample(df, n=SAMPLE_ROWS, seed=0):
+    """
+    Proportional stratified sample over region x sexe (at least MIN_PER_STRATUM rows
+    per stratum when available), with a WEIGHT column of population rows per sampled row.
+    """
+    columns = [column for column in STRATA if column in df.columns]
+    stratum = np.zeros(len(df), dtype=np.int64)
+    for column in columns:
+        codes, labels = encode(df[column])
+        stratum = stratum * (len(labels) + 1) + (codes + 1)
+    stratum = np.unique(stratum, return_inverse=True)[1]
+
+    population = np.bincount(stratum)
+    share = n / max(len(df), 1)
+    quota = np.minimum(population, np.maximum(np.round(population * share), MIN_PER_STRATUM)).astype(np.int64)
+
+    # Random order within each stratum; keep the first `quota` rows of each
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(len(df)), stratum))
+    starts = np.concatenate(([0], np.cumsum(population)[:-1]))
+    rank = np.arange(len(df)) - starts[stratum[order]]
+    rows = np.sort(order[rank < quota[stratum[order]]])
+
+    sample = df.iloc[rows].reset_index(drop=True)
+    sample[WEIGHT] = (population / quota)[stratum[rows]]
+    return sample
+
+
+def margin_of_error(weights, z=1.96):
+    """
+    95% bound, in percentage points, on any share estimated from a weighted sample
+    (worst case p = 0.5, Kish effective sample size).
+    """
+    weights = np.asarray(weights, dtype="float64")
+    if not len(weights):
+        return np.nan
+    n_eff = weights.sum() ** 2 / (weights ** 2).sum()
+    return 100 * z * 0.5 / np.sqrt(n_eff)
+
+
+def is_sampled(df):
+    return WEIGHT in df.columns
+
+
+def describe(df):
+    """'approx. ±x pp' label for charts drawn from a sample, '' for exact data."""
+    if not is_sampled(df):
+        return ""
+    return f"approx. ±{margin_of_error(df[WEIGHT]):.1f} pp (95%, n={len(df):,})"
+
+
+def data_columns(df):
+    """Columns of the survey itself (without the sample weight)."""
+    return df.columns.drop(WEIGHT, errors="ignore")
@@ -0,0 +1,253 @@
+"""
+Static-site build: every page of the dashboard as a standalone HTML file.
+
+Each page is rendered headlessly (Streamlit's testing API, so the section code
+runs unchanged) once per Region x Gender state, "All" included. The rendered
+text, metrics and Plotly figures of every state are embedded in the page, with
+content shared between states stored once, and the Region/Gender selectors
+swap them in the browser: no server, no reruns.
+
+    python -m utils.site --out site
+"""
+import argparse
+import html
+import json
+import os
+import sys
+from itertools import product
+from pathlib import Path
+
+from plotly.offline import get_plotlyjs_version
+
+from utils.pages import APP, PAGES, headless
+
+# Page label -> output file (the first page is the site's index)
+FILES = {page: "index.html" if i == 0 else f"{module}.html" for i, (page, module) in enumerate(PAGES.items())}
+
+# Filters offered by the static site (single choice or All)
+SITE_FILTERS = {"region": "Region", "gender": "Gender"}
+
+HEADINGS = {"title": "#", "header": "##", "subheader": "###"}
+ALERTS = ("info", "warning", "error", "success")
+
+
+# --------------------------
+# Capture (headless render)
+# --------------------------
+class Interner:
+    """Stores each distinct JSON value once; the page references it by index."""
+
+    def __init__(self):
+        self.values, self._index = [], {}
+
+    def ref(self, value):
+        text = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        if text not in self._index:
+            self._index[text] = len(self.values)
+            self.values.append(value)
+        return {"$ref": self._index[text]}
+
+
+def _figure(element, values):
+    """Plotly spec of a chart, with layout, traces and GeoJSON stored once across states."""
+    spec = json.loads(element.proto.spec)
+    traces = []
+    for trace in spec.get("data", []):
+        if "geojson" in trace:
+            trace = dict(trace, geojson=values.ref(trace["geojson"]))
+        traces.append(trace)
+    return {"data": values.ref(traces), "layout": values.ref(spec.get("layout", {}))}
+
+
+def _node(node, values):
+    kind = getattr(node, "type", None)
+    if kind in ("flex_container", "horizontal"):
+        return {"t": "row", "c": _children(node, values)}
+    if kind == "column":
+        return {"t": "col", "c": _children(node, values)}
+    if kind in HEADINGS:
+        return values.ref({"t": "md", "v": f"{HEADINGS[kind]} {node.value}"})
+    if kind == "markdown":
+        if node.value.lstrip().startswith("<style>"):
+            return None  # the app's own theme CSS
+        return values.ref({"t": "md", "v": node.value})
+    if kind in ALERTS:
+        return values.ref({"t": "alert", "k": kind, "v": node.value})
+    if kind == "metric":
+        return values.ref({"t": "metric", "label": node.label, "v": node.value})
+    if kind == "plotly_chart":
+        return {"t": "plot", "fig": _figure(node, values)}
+    if hasattr(node, "children") and isinstance(node.children, dict):
+        return {"t": "box", "c": _children(node, values)}
+    return None  # widgets and elements the static site does not render
+
+
+def _children(node, values):
+    return [child for child in (_node(c, values) for c in node.children.values()) if child is not None]
+
+
+def _state_id(state):
+    return "|".join(state.get(key, "") for key in SITE_FILTERS)
+
+
+def capture_page(at, page, options):
+    """Render `page` for every filter state; returns its state trees and shared values."""
+    values = Interner()
+    states = {}
+    at.radio(key="main_navigation").set_value(page)
+    for combo in product(*([None] + options[key] for key in SITE_FILTERS)):
+        state = {key: value for key, value in zip(SITE_FILTERS, combo) if value is not None}
+        for key in SITE_FILTERS:
+            at.multiselect(key=f"filter_{key}").set_value([state[key]] if key in state else [])
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{page} / {state}: {at.exception[0].message}")
+        states[_state_id(state)] = values.ref(_children(at.main, values))
+    return {"states": states, "values": values.values}
+
+
+# --------------------------
+# HTML output
+# --------------------------
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} · Digital Culture in France</title>
+<script src="https://cdn.plot.ly/plotly-{plotly_version}.min.js" charset="utf-8"></script>
+<script src="https://cdn.jsdelivr.net/npm/marked@12/marked.min.js"></script>
+<style>
+body {{margin:0; display:flex; font-family:"Source Sans Pro",sans-serif; color:#31333F;}}
+aside {{width:260px; min-height:100vh; padding:2rem 1rem; box-sizing:border-box; flex-shrink:0;
+       background:linear-gradient(180deg,#0A2540 0%,#133b66 100%); color:white;}}
+aside h3 {{text-align:center; text-transform:uppercase; letter-spacing:0.5px;}}
+aside label {{display:block; margin:1rem 0 0.3rem; font-weight:600;}}
+aside select {{width:100%; padding:6px; border-radius:8px;}}
+aside nav a {{display:block; color:white; text-decoration:none; padding:6px 10px; border-radius:8px; margin-top:4px;}}
+aside nav a.active {{background:white; color:#0A2540; font-weight:700;}}
+main {{flex:1; padding:2rem 3rem; min-width:0;}}
+.row {{display:flex; gap:1rem;}} .col {{flex:1; min-width:0;}}
+.alert {{padding:1rem; border-radius:8px; margin:1rem 0;}}
+.alert-info {{background:#E8F1FB;}} .alert-warning {{background:#FFF8E1;}}
+.alert-error {{background:#FDECEA;}} .alert-success {{background:#E8F5E9;}}
+.metric .label {{font-size:14px;}} .metric .value {{font-size:2.25rem;}}
+</style>
+</head>
+<body>
+<aside>
+<h3>Digital Culture Dashboard</h3>
+{selects}
+<nav>{nav}</nav>
+</aside>
+<main id="page"></main>
+<script type="application/json" id="page-data">{data}</script>
+<script>
+const DATA = JSON.parse(document.getElementById("page-data").textContent);
+const FILTERS = {filters};
+const resolved = {{}};
+function deref(x) {{
+  if (Array.isArray(x)) return x.map(deref);
+  if (x && typeof x === "object") {{
+    if ("$ref" in x) {{
+      if (!(x.$ref in resolved)) resolved[x.$ref] = deref(DATA.values[x.$ref]);
+      return resolved[x.$ref];
+    }}
+    const out = {{}};
+    for (const key in x) out[key] = deref(x[key]);
+    return out;
+  }}
+  return x;
+}}
+function render(node, parent) {{
+  const el = document.createElement("div");
+  parent.appendChild(el);
+  if (Array.isArray(node)) {{ node.forEach(child => render(child, el)); return; }}
+  if (node.t === "row" || node.t === "col" || node.t === "box") {{
+    el.className = node.t;
+    node.c.forEach(child => render(child, el));
+  }} else if (node.t === "md") {{
+    el.innerHTML = marked.parse(node.v);
+  }} else if (node.t === "alert") {{
+    el.className = "alert alert-" + node.k;
+    el.innerHTML = marked.parse(node.v);
+  }} else if (node.t === "metric") {{
+    el.className = "metric";
+    el.innerHTML = '<div class="label"></div><div class="value"></div>';
+    el.firstChild.textContent = node.label;
+    el.lastChild.textContent = node.v;
+  }} else if (node.t === "plot") {{
+    Plotly.newPlot(el, node.fig.data, node.fig.layout, {{responsive: true, displaylogo: false}});
+  }}
+}}
+function currentState() {{
+  return FILTERS.map(key => document.getElementById("filter-" + key).value).join("|");
+}}
+function show() {{
+  const params = new URLSearchParams(FILTERS.map(key => [key, document.getElementById("filter-" + key).value]));
+  history.replaceState(null, "", "#" + params);
+  document.querySelectorAll("nav a").forEach(a => a.hash = params);
+  const page = document.getElementById("page");
+  page.replaceChildren();
+  const tree = deref(DATA.states[currentState()] || DATA.states[FILTERS.map(() => "").join("|")]);
+  render(tree, page);
+}}
+const initial = new URLSearchParams(location.hash.slice(1));
+FILTERS.forEach(key => {{
+  const select = document.getElementById("filter-" + key);
+  if (initial.has(key)) select.value = initial.get(key);
+  select.addEventListener("change", show);
+}});
+show();
+</script>
+</body>
+</html>
+"""
+
+
+def _select(key, label, options):
+    choices = "".join(f'<option value="{html.escape(o)}">{html.escape(o)}</option>' for o in options)
+    return f'<label for="filter-{key}">{label}</label><select id="filter-{key}"><option value="">All</option>{choices}</select>'
+
+
+def render_page(page, captured, options):
+    selects = "".join(_select(key, label, options[key]) for key, label in SITE_FILTERS.items())
+    nav = "".join(
+        f'<a href="{file}"{" class=active" if label == page else ""}>{html.escape(label)}</a>'
+        for label, file in FILES.items()
+    )
+    # "</" must not close the data <script> early
+    data = json.dumps(captured, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return TEMPLATE.format(
+        title=html.escape(page), plotly_version=get_plotlyjs_version(), selects=selects, nav=nav,
+        data=data, filters=json.dumps(list(SITE_FILTERS)),
+    )
+
+
+def build(out, pages=PAGES):
+    from streamlit.testing.v1 import AppTest
+
+    headless()
+    os.environ.setdefault("DASHBOARD_WARMUP", "0")
+    out.mkdir(parents=True, exist_ok=True)
+    at = AppTest.from_file(str(APP), default_timeout=300)
+    at.run()
+    options = {key: list(at.multiselect(key=f"filter_{key}").options) for key in SITE_FILTERS}
+    for page in pages:
+        captured = capture_page(at, page, options)
+        path = out / FILES[page]
+        path.write_text(render_page(page, captured, options), encoding="utf-8")
+        print(f"{page:<18} {len(captured['states']):>3} states  {path.stat().st_size / 1024:>8.0f} KiB  -> {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--out", type=Path, default=Path("site"), help="output directory")
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=list(PAGES))
+    args = parser.parse_args(argv)
+    build(args.out.resolve(), args.pages)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# DASHBOARD_CACHE=<file> moves the on-disk cache, DASHBOARD_CACHE=0 disables it; DASHBOARD_CACHE_MB bounds its size
+CACHE_PATH = os.environ.get("DASHBOARD_CACHE", ".cache/dashboard.sqlite3")
+CACHE_MB = float(os.environ.get("DASHBOARD_CACHE_MB", "512"))
+
+# Modules whose code shapes cached results: editing any of them invalidates the cache
+VERSIONED = ("utils/io.py", "utils/filters.py", "utils/cube.py", "utils/viz.py")
+# Access times of cache hits are written in batches of this many (or with the next write)
+TOUCH_BATCH = 64
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries ("
+    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+    # Running total of the entry sizes, kept by triggers so eviction never sums the table
+    "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM entries",
+    "CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries "
+    "BEGIN UPDATE totals SET size = size + new.size WHERE id = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries "
+    "BEGIN UPDATE totals SET size = size - old.size WHERE id = 0; END",
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+logger = logging.getLogger("dashboard.store")
+
+
+def _code_version():
+    digest = hashlib.sha256()
+    for name in VERSIONED:
+        digest.update((ROOT / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = _code_version()
+
+
+def fingerprint(path):
+    """Cheap dataset identity: path, size and modification time (no full read)."""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def make_key(*parts):
+    """Stable cache key for (fingerprint, namespace, ...) parts, scoped to the code version."""
+    return hashlib.sha256(repr((CODE_VERSION,) + parts).encode("utf-8")).hexdigest()
+
+
+class Store:
+    """
+    Size-bounded, least-recently-used pickle store in one SQLite file.
+    Safe to share between threads and worker processes (WAL, one connection
+    per thread); any storage error is logged and treated as a cache miss.
+    Hits only record their access time in memory; it reaches the file in
+    batches, so reads stay reads.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = str(path)
+        self.max_bytes = int(max_bytes)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._touched = {}  # key -> access time not written yet
+        self._touched_lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"])
+
+    def _connect(self):
+        if self._pid != os.getpid():  # forked: never reuse the parent's connections
+            self._local, self._pid = threading.local(), os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._transaction(conn):
+                for statement in SCHEMA:
+                    conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    @contextmanager
+    def _transaction(conn):
+        conn.execute("BEGIN IMMEDIATE")  # one writer at a time across processes
+        try:
+            yield
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _touch(self, key):
+        """Record a hit; returns the pending access times once a batch is full."""
+        with self._touched_lock:
+            self._touched[key] = time.time()
+            if len(self._touched) < TOUCH_BATCH:
+                return None
+            return self._take_touched()
+
+    def _take_touched(self):
+        touched, self._touched = self._touched, {}
+        return [(accessed, key) for key, accessed in touched.items()]
+
+    def _write_touched(self, conn, touched):
+        conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?", touched)
+
+    def get(self, key, default=None):
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            touched = self._touch(key)
+            if touched:
+                with self._transaction(conn):
+                    self._write_touched(conn, touched)
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            logger.warning("disk cache read failed", exc_info=True)
+            return default
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            conn = self._connect()
+            with self._touched_lock:
+                touched = self._take_touched()
+            with self._transaction(conn):
+                self._write_touched(conn, touched)  # so eviction sees the latest hits
+                # Delete + insert rather than REPLACE, which would skip the size triggers
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.execute(
+                    "INSERT INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            logger.warning("disk cache write failed", exc_info=True)
+
+    def _evict(self, conn):
+        """Drop the least recently used entries until the store fits its size bound."""
+        overflow = conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0] - self.max_bytes
+        if overflow <= 0:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            doomed.append((key,))
+            overflow -= size
+            if overflow <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+
+def default_store():
+    """The configured on-disk store, or None when disabled."""
+    if CACHE_PATH in ("", "0"):
+        return None
+    return Store(CACHE_PATH, CACHE_MB * 1024 * 1024)
@@ -0,0 +1,113 @@
+"""
+Synthetic scale-up datasets derived from data/data.xlsx.
+
+Learns the joint distribution of the categorical columns (every observed
+respondent profile with its frequency) and the marginal distribution of each
+numeric column from the real file, as cleaned by load_data, then samples
+arbitrarily many rows in vectorized chunks straight to Parquet.
+
+    python -m utils.synth --rows 10000000 --out data/synthetic_10m.parquet
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK = 1_000_000
+
+
+def fit(df):
+    """
+    Learn the sampling model from a cleaned respondent frame.
+    Categoricals keep their joint structure; numerics are independent marginals.
+    """
+    numeric = df.select_dtypes(include="number").columns.tolist()
+    categorical = [col for col in df.columns if col not in numeric]
+
+    codes, categories = {}, {}
+    for col in categorical:
+        col_codes, uniques = pd.factorize(df[col], sort=True)
+        codes[col] = col_codes
+        categories[col] = list(uniques)
+
+    profiles = (
+        pd.DataFrame(codes)
+        .value_counts(sort=False)
+        .reset_index(name="weight")
+    )
+    weights = profiles.pop("weight").to_numpy(dtype="float64")
+
+    marginals = {}
+    for col in numeric:
+        values, counts = np.unique(df[col].to_numpy(dtype="float64"), return_counts=True, equal_nan=True)
+        marginals[col] = (values, counts / counts.sum())
+
+    return {
+        "columns": df.columns.tolist(),
+        "categories": categories,
+        "profiles": {col: profiles[col].to_numpy(dtype="int16") for col in categorical},
+        "weights": weights / weights.sum(),
+        "marginals": marginals,
+        "dtypes": {col: df[col].dtype for col in numeric},
+    }
+
+
+def sample(model, n_rows, rng):
+    """Draw `n_rows` synthetic respondents as a DataFrame (categoricals as pandas Categorical)."""
+    picks = rng.choice(len(model["weights"]), size=n_rows, p=model["weights"])
+    data = {}
+    for col in model["columns"]:
+        if col in model["profiles"]:
+            # Code -1 (missing) maps to NaN in from_codes
+            data[col] = pd.Categorical.from_codes(model["profiles"][col][picks], categories=model["categories"][col])
+        else:
+            values, probs = model["marginals"][col]
+            data[col] = rng.choice(values, size=n_rows, p=probs).astype(model["dtypes"][col])
+    return pd.DataFrame(data)
+
+
+def generate(model, n_rows, path, seed=0, chunk_size=DEFAULT_CHUNK):
+    """
+    Write `n_rows` synthetic rows to a Parquet file, one row group per chunk.
+    The same (model, n_rows, seed, chunk_size) always produces the same file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n_chunks = max(1, -(-n_rows // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    writer = None
+    try:
+        for i, chunk_seed in enumerate(seeds):
+            size = min(chunk_size, n_rows - i * chunk_size)
+            chunk = sample(model, size, np.random.default_rng(chunk_seed))
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main(argv=None):
+    from utils.io import read_dataset, clean_dataset
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic scale-up dataset.")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True, help="output .parquet path")
+    parser.add_argument("--source", default="data/data.xlsx")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    args = parser.parse_args(argv)
+
+    model = fit(clean_dataset(read_dataset(args.source)))
+    start = time.perf_counter()
+    generate(model, args.rows, args.out, seed=args.seed, chunk_size=args.chunk_size)
+    print(f"Wrote {args.rows:,} rows to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,47 @@
+import json
+import threading
+from collections import OrderedDict
+
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils import memory
+from utils.cube import memo_key
+from utils.filters import cross_filter
+from utils.perf import plotly_chart
+from utils.sample import WEIGHT, describe, is_sampled
+from utils.store import make_key
 
 def bar(df, x, y, title, color=None, text_auto=True):
     fig = px.bar(df, x=x, y=y, color=color, text_auto=text_auto, title=title)
     fig.update_layout(xaxis_title=x, yaxis_title=y)
     return fig
 
-def pie(df, names, title):
-    return px.pie(df, names=names, title=title)
+def pie(df, names, title, values=None):
+    return px.pie(df, names=names, values=values, title=title)
+
+def _title(df, title):
+    # Charts drawn from the approximate-mode sample carry their error bound
+    label = describe(df)
+    return f"{title}<br><sup>{label}</sup>" if label else title
 
 def hist(df, x, title, nbins=15, color=None):
+    if is_sampled(df):
+        # Weighted sum: bars estimate respondent counts, not sample counts
+        return px.histogram(df, x=x, y=WEIGHT, histfunc="sum", nbins=nbins, color=color, title=_title(df, title))
     return px.histogram(df, x=x, nbins=nbins, color=color, title=title)
 
+def box(df, x, y, title, color=None):
+    return px.box(df, x=x, y=y, color=color, title=_title(df, title))
+
 def scatter(df, x, y, color, title):
     return px.scatter(df, x=x, y=y, color=color, title=title)
 
 def choropleth(df, geo_col, value_col, title):
-    import geopandas as gpd
-    import json
-    from urllib.request import urlopen
+    from utils.io import load_geojson
 
-    url = "https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/regions.geojson"
-    geojson = json.load(urlopen(url))
+    geojson = load_geojson()
     fig = px.choropleth(
         df, geojson=geojson,
         locations=geo_col, featureidkey="properties.nom",
@@ -37,3 +58,379 @@ def count_df(df, column_name, new_name=None):
     counts = df[column_name].value_counts(dropna=False).reset_index()
     counts.columns = [new_name, 'Count']
     return counts
+
+
+# --------------------------
+# Chart registry
+# --------------------------
+# Aggregate charts are declared here and drawn with draw(view, key): the registry reads their
+# data from the cube view, builds each figure once per filter state, trims its payload and
+# renders it through perf.plotly_chart (build/serialize timed per chart key).
+#
+#   by      dimensions (chart columns or filter keys); by[0] is the category axis, by[1] the colour
+#   stat    "count", "share" (% of the selection) or "mean" (of `measure`)
+#   kind    "bar", "hbar", "pie" or "choropleth"
+#   labels  display names of the dimensions and of "value" (axes, hover, legends; "Count" by default)
+#   style   extra px arguments; layout / traces: figure updates
+#   filter  filter key a click on the chart sets (cross-filtering)
+#   sort    largest first (default for counts, off for means); dropna: keep a missing-value group
+CHARTS = {
+    # Audience Profile
+    "gender": dict(
+        by=("gender",), stat="count", kind="pie", filter="gender",
+        title="Gender Distribution",
+    ),
+    "region": dict(
+        by=("region",), stat="count", kind="bar", filter="region", dropna=False,
+        title="Respondents by Region",
+        labels={"region": "Region"}, layout=dict(xaxis_title="Region", yaxis_title="Count"),
+    ),
+    "agglo": dict(
+        by=("agglomeration",), stat="count", kind="bar", filter="agglomeration", dropna=False,
+        title="Type of Urban Area",
+        labels={"agglomeration": "Agglomeration Type"},
+        layout=dict(xaxis_title="Agglomeration Type", yaxis_title="Count"),
+    ),
+    "employment": dict(
+        by=("employment",), stat="count", kind="bar", filter="employment", dropna=False,
+        title="Employment Status of Respondents",
+        labels={"employment": "Employment Status"},
+        layout=dict(xaxis_title="Employment Status", yaxis_title="Count"),
+    ),
+    "household": dict(
+        by=("taille_foyer",), stat="count", kind="bar", dropna=False,
+        title="Household Size Distribution",
+        labels={"taille_foyer": "Household Size"},
+        layout=dict(xaxis_title="Household Size", yaxis_title="Count"),
+    ),
+    "household_status": dict(
+        by=("statut_foyer",), stat="count", kind="pie",
+        title="Household Status (Single, Couple, etc.)",
+    ),
+    # Online Habits
+    "internet_freq": dict(
+        by=("frequence_internet",), stat="share", kind="hbar", text="{:.1f}%",
+        title="How Often Respondents Use the Internet",
+        labels={"frequence_internet": "Internet Usage Frequency", "value": "Percentage"},
+        style=dict(color="value", color_continuous_scale="Blues"),
+        layout=dict(xaxis_title="Percentage of Respondents", yaxis_title="",
+                    xaxis=dict(showgrid=True, ticksuffix="%"), yaxis=dict(autorange="reversed")),
+    ),
+    "vpn": dict(
+        by=("utilisation_vpn",), stat="count", kind="pie",
+        title="VPN Usage Among Respondents",
+        labels={"utilisation_vpn": "VPN Usage"},
+        style=dict(hole=0.5, color_discrete_sequence=px.colors.sequential.Blues_r),
+        traces=dict(textinfo="percent+label", textposition="outside", textfont_size=14, pull=0.05),
+        layout=dict(showlegend=True),
+    ),
+    "cracked_apps": dict(
+        by=("utilisation_applis_crackees", "gender"), stat="count", kind="bar", sort=False,
+        title="Cracked Apps Usage by Gender",
+        labels={"gender": "sexe"},
+        style=dict(barmode="group", color_discrete_sequence=px.colors.qualitative.Set2),
+        layout=dict(xaxis_title="Cracked Apps Usage Frequency", yaxis_title="Number of Respondents"),
+    ),
+    "stacked_legal": dict(
+        by=("frequence_conso_culturelle", "type_conso_legale_ou_illegale"), stat="count", kind="bar", sort=False,
+        title="Frequency of Cultural Consumption by Legal/Illegal Access",
+        labels={"type_conso_legale_ou_illegale": "Type"},
+        style=dict(barmode="stack", color_discrete_sequence=px.colors.sequential.Blues),
+        layout=dict(xaxis_title="Frequency of Cultural Consumption", yaxis_title="Number of Respondents"),
+    ),
+    "streaming_behavior": dict(
+        by=("utilisation_telechargement_streaming",), stat="count", kind="hbar",
+        title="Streaming and Downloading Habits",
+        labels={"utilisation_telechargement_streaming": "Streaming/Downloading Behavior"},
+        style=dict(color="value", color_continuous_scale="Blues"),
+        layout=dict(xaxis_title="Number of Respondents", yaxis_title="Streaming / Downloading Frequency"),
+    ),
+    # Cultural Economy
+    "spending_donut": dict(
+        by=("spending",), stat="count", kind="pie", filter="spending",
+        title="Cultural Spending Brackets",
+        labels={"spending": "Spending Range"},
+        style=dict(hole=0.4, color_discrete_sequence=px.colors.sequential.Blues_r),
+        traces=dict(textinfo="percent+label", textposition="outside"),
+    ),
+    "paid": dict(
+        by=("gratuit_ou_payant",), stat="count", kind="bar",
+        title="Free vs Paid Consumption",
+        labels={"gratuit_ou_payant": "Consumption Type"},
+    ),
+    "access": dict(
+        by=("acces_services_payants",), stat="count", kind="pie", exclude=("null",),
+        title="Access to Paid Services",
+        traces=dict(textinfo="percent+label", textposition="outside"),
+    ),
+    "spend_type": dict(
+        by=("type_conso_legale_ou_illegale",), stat="mean", measure="spend", kind="bar",
+        title="Average Monthly Spending by Legal vs Illegal Consumption",
+        labels={"type_conso_legale_ou_illegale": "Consumption Type", "value": "Average Monthly Spending (€)"},
+        style=dict(color="value", color_continuous_scale="Blues"),
+        layout=dict(xaxis_title="Consumption Type", yaxis_title="Average Spending (€)"),
+    ),
+    # Key Findings
+    "spend_freq": dict(
+        by=("frequence_conso_culturelle",), stat="mean", measure="spend", kind="bar", sort=True,
+        title="Average Monthly Spending by Cultural Consumption Frequency",
+        labels={"value": "depense_mensuelle_culturelle"},
+        style=dict(color="value", color_continuous_scale="Blues"),
+        layout=dict(xaxis_title="Cultural Consumption Frequency", yaxis_title="Average Monthly Spending (€)"),
+    ),
+    "spending_age": dict(
+        by=("age",), stat="mean", measure="spend", kind="bar", filter="age",
+        title="Average Monthly Cultural Spending by Age Group",
+        labels={"age": "age_group", "value": "depense_mensuelle_culturelle"},
+        style=dict(color="value", color_continuous_scale="Blues"),
+        layout=dict(xaxis_title="Age Group", yaxis_title="Average Spending (€)"),
+    ),
+    # Overview
+    "intro_map": dict(
+        by=("region",), stat="count", kind="choropleth", filter="region",
+        title="Regional Distribution of Respondents in France",
+        labels={"value": "count"},
+        style=dict(color_continuous_scale="Blues", hover_data=["value"]),
+        layout=dict(coloraxis_colorbar=dict(title="Respondents", tickvals=[0, 250, 500, 750, 1000])),
+    ),
+    "intro_spending_map": dict(
+        by=("region",), stat="mean", measure="spend", kind="choropleth", filter="region",
+        title="Average Monthly Cultural Spending (€) by Region",
+        labels={"value": "avg_spending"},
+        style=dict(color_continuous_scale="YlGnBu", hover_data={"value": ":.2f"}),
+        layout=dict(coloraxis_colorbar=dict(title="€ / month", tickprefix="€")),
+    ),
+}
+
+MAP_GEOS = dict(fitbounds="locations", visible=False, projection_type="mercator",
+                showcountries=False, showcoastlines=True, coastlinecolor="gray")
+MAP_LAYOUT = dict(width=900, height=600, margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                  geo=dict(bgcolor="rgba(0,0,0,0)"), paper_bgcolor="rgba(0,0,0,0)", font=dict(size=14))
+# Map outlines are sent with 3 decimals (~100 m), far below what a France-wide map can show
+GEO_DIGITS = 3
+
+# Aggregated frames and built figures per (chart, cube, selections); sized by frame + serialized JSON
+FIGURE_CACHE_SIZE = 1024
+_figures = OrderedDict()
+_figure_sizes = {}
+_figures_lock = threading.Lock()
+_geojson = {}  # region name -> trimmed outline, built once from the downloaded GeoJSON
+_geojson_bytes = {}  # region name -> serialized size of its trimmed outline
+_template_bytes = []  # serialized size of the (shared) Plotly template, measured once
+
+
+def queries(*keys):
+    """Cube queries (group-by columns) behind the given charts, for a section's QUERIES."""
+    return list(dict.fromkeys(tuple(CHARTS[key]["by"]) for key in keys))
+
+
+def chart_data(view, key):
+    """
+    The aggregated rows behind chart `key` for the view's selections (dimensions + "value").
+    Only aggregates: the figure is built when the chart is drawn.
+    """
+    return _entry(view, key, figure=False)[0]
+
+
+def prebuild(view, keys):
+    """Build and cache the figures of charts `keys` for the view's selections; returns how many were built."""
+    return sum(_entry(view, key)[1] is not None for key in keys)
+
+
+def draw(view, key):
+    """Render chart `key` for the view's selections; returns False when it cannot be drawn."""
+    spec = CHARTS[key]
+    fig = _entry(view, key)[1]
+    if fig is None:
+        return False
+    kwargs = cross_filter(key, spec["filter"], view.options(spec["filter"])) if "filter" in spec else {}
+    plotly_chart(fig, use_container_width=True, key=key, **kwargs)
+    return True
+
+
+def _aggregate(view, spec):
+    by = spec["by"]
+    if spec["stat"] == "mean":
+        frame = view.mean(by[0], spec["measure"]).rename(columns={f"{spec['measure']}_mean": "value"})
+        if spec.get("sort", False):
+            frame = frame.sort_values("value", ascending=False, kind="stable")
+    else:
+        frame = view.counts(*by, dropna=spec.get("dropna", True), sort=spec.get("sort", True))
+        frame = frame.rename(columns={"Count": "value"})
+    if "exclude" in spec:
+        frame = frame[~frame[by[0]].str.lower().isin(spec["exclude"])]
+    if spec["stat"] == "share":
+        frame = frame.assign(value=frame["value"] / frame["value"].sum() * 100)
+    return frame.reset_index(drop=True)
+
+
+def _labels(spec):
+    return {"value": "Count", **spec.get("labels", {})}
+
+
+def _bar(frame, spec, orientation=None):
+    by = spec["by"]
+    args = dict(x="value", y=by[0], orientation="h") if orientation == "h" else dict(x=by[0], y="value")
+    if len(by) > 1:
+        args["color"] = by[1]
+    if "text" in spec:
+        args["text"] = frame["value"].map(spec["text"].format)
+    else:
+        args["text_auto"] = True
+    return px.bar(frame, title=spec["title"], labels=_labels(spec), **{**args, **spec.get("style", {})})
+
+
+def _pie(frame, spec):
+    return px.pie(frame, names=spec["by"][0], values="value", title=spec["title"],
+                  labels=_labels(spec), **spec.get("style", {}))
+
+
+def _choropleth(frame, spec):
+    region = spec["by"][0]
+    # GeoJSON names use a straight apostrophe; clicks map back through the original label
+    frame = frame.assign(label=frame[region], **{region: frame[region].str.replace("’", "'", regex=False)})
+    geojson = _trimmed_geojson(tuple(sorted(frame[region])))
+    if geojson is None:
+        return None
+    fig = px.choropleth(
+        frame, geojson=geojson, locations=region, featureidkey="properties.nom",
+        color="value", custom_data=["label"], title=spec["title"], labels=_labels(spec),
+        **spec.get("style", {})
+    )
+    fig.update_geos(**MAP_GEOS)
+    fig.update_layout(**MAP_LAYOUT)
+    return fig
+
+
+BUILDERS = {
+    "bar": _bar,
+    "hbar": lambda frame, spec: _bar(frame, spec, orientation="h"),
+    "pie": _pie,
+    "choropleth": _choropleth,
+}
+
+
+def _entry(view, key, figure=True):
+    """(frame, figure) of a chart, cached; the figure is None until one is asked for (or unavailable)."""
+    spec = CHARTS[key]
+    cube = view.cube
+    state = memo_key(spec["by"], view.selections)
+    cache_key = (key, id(cube), cube.get("version"), state)
+    with _figures_lock:
+        frame, fig = _figures.get(cache_key, (None, None))
+        if frame is not None:
+            _figures.move_to_end(cache_key)
+            if fig is not None or not figure:
+                return frame, fig
+
+    if frame is None:
+        frame = _aggregate(view, spec)
+    spec_json = None
+    if figure:
+        fig, spec_json = _figure(cube, key, state, frame)
+
+    if spec_json is not None:
+        size = memory.nbytes(frame) + len(spec_json)
+    else:
+        size = memory.nbytes(frame) + (_figure_bytes(fig, frame, spec) if fig is not None else 0)
+    with _figures_lock:
+        _figures[cache_key] = (frame, fig)
+        _figure_sizes[cache_key] = size
+        _figures.move_to_end(cache_key)
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _evict_figure()
+    return frame, fig
+
+
+def _figure_bytes(fig, frame, spec):
+    """
+    Approximate size of a figure without serializing it (a cold build would pay for that):
+    its template, about two copies of the frame's values and, for maps, the outlines they embed.
+    """
+    if not _template_bytes:
+        _template_bytes.append(len(pio.to_json(go.Figure(layout_template=fig.layout.template), validate=False)))
+    size = _template_bytes[0] + 2 * memory.nbytes(frame)
+    if spec["kind"] == "choropleth":
+        size += sum(_geojson_bytes.get(name.replace("’", "'"), 0) for name in frame[spec["by"][0]])
+    return size
+
+
+def _figure(cube, key, state, frame):
+    """
+    (figure, its JSON) of chart `key`: read from the on-disk store when this dataset, code and
+    filter state were drawn before (a restart or another worker), else built and stored.
+    """
+    spec = CHARTS[key]
+    store = cube.get("store")
+    if store is not None:
+        version, disk_key = cube.get("version"), make_key(cube.get("fingerprint"), "figure", key, state)
+        spec_json = store.get(disk_key)
+        if spec_json is not None:
+            return pio.from_json(spec_json, skip_invalid=True), spec_json
+    fig = BUILDERS[spec["kind"]](frame, spec)  # None: retried next time (map outlines may download)
+    if fig is None:
+        return None, None
+    fig.update_layout(**spec.get("layout", {}))
+    fig.update_traces(**spec.get("traces", {}))
+    if store is None:
+        return fig, None
+    spec_json = pio.to_json(fig, validate=False)
+    if cube.get("version") == version:  # not if a batch was merged while building
+        store.put(disk_key, spec_json)
+    return fig, spec_json
+
+
+def _evict_figure():
+    key, _ = _figures.popitem(last=False)
+    return _figure_sizes.pop(key, 0)
+
+
+def figure_bytes():
+    with _figures_lock:
+        return sum(_figure_sizes.values())
+
+
+def evict_coldest_figure():
+    with _figures_lock:
+        return _evict_figure() if _figures else 0
+
+
+memory.register_cache("figures", figure_bytes, evict_coldest_figure)
+
+
+def _trim_ring(ring):
+    points = [[round(x, GEO_DIGITS), round(y, GEO_DIGITS)] for x, y, *_ in ring]
+    kept = [point for i, point in enumerate(points) if i == 0 or point != points[i - 1]]
+    return kept if len(kept) >= 4 else points
+
+
+def _trim_geometry(geometry):
+    if geometry["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": [_trim_ring(ring) for ring in geometry["coordinates"]]}
+    if geometry["type"] == "MultiPolygon":
+        polygons = [[_trim_ring(ring) for ring in polygon] for polygon in geometry["coordinates"]]
+        return {"type": "MultiPolygon", "coordinates": polygons}
+    return geometry
+
+
+def _trimmed_geojson(names):
+    """
+    Region outlines for the regions on the map only, with rounded coordinates:
+    the GeoJSON is embedded in every map figure sent to the browser. Outlines are
+    trimmed once; each map only picks its regions from them.
+    """
+    if not _geojson:
+        from utils.io import load_geojson
+
+        geojson = load_geojson()
+        if geojson is None:
+            return None
+        _geojson.update({
+            feature["properties"]["nom"]: {
+                "type": "Feature", "properties": {"nom": feature["properties"]["nom"]},
+                "geometry": _trim_geometry(feature["geometry"]),
+            }
+            for feature in geojson["features"] if feature["properties"].get("nom")
+        })
+        _geojson_bytes.update({name: len(json.dumps(feature, separators=(",", ":"))) for name, feature in _geojson.items()})
+    return {"type": "FeatureCollection", "features": [_geojson[name] for name in names if name in _geojson]}
@@ -0,0 +1,120 @@
+import importlib
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+
+from utils.cube import CubeView, attach, memo_key, portable, query, remember
+
+# DASHBOARD_WARMUP=0 disables the warm-up; DASHBOARD_WARMUP_WORKERS caps the process pool
+ENABLED = os.environ.get("DASHBOARD_WARMUP", "1") not in ("", "0")
+WORKERS = int(os.environ.get("DASHBOARD_WARMUP_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+# Filter states warmed: every region x gender combination, "All" included
+WARM_FILTERS = ("region", "gender")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+logger = logging.getLogger("dashboard.warmup")
+
+_cube = None
+
+
+def filter_states(cube):
+    """Selections for every combination of the warmed filters (None = All)."""
+    keys = [key for key in WARM_FILTERS if key in cube["slices"]]
+    choices = [[None] + cube["labels"][key] for key in keys]
+    return [
+        {key: [value] for key, value in zip(keys, combo) if value is not None}
+        for combo in product(*choices)
+    ]
+
+
+def _init_worker(tables):
+    global _cube
+    _cube = attach(tables)
+
+
+def _warm_state(modules, selections):
+    """Run every page query for one filter state; returns (memo key, result) pairs."""
+    entries = []
+    for module in modules:
+        for by in importlib.import_module(f"sections.{module}").QUERIES:
+            entries.append((memo_key(by, selections), query(_cube, by, selections)))
+    return entries
+
+
+def compute(tables, modules, workers=WORKERS):
+    """Every page query for every warmed filter state, spread over a process pool."""
+    entries = []
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tables,)) as pool:
+        futures = [pool.submit(_warm_state, modules, selections) for selections in filter_states(tables)]
+        for future in as_completed(futures):
+            entries += future.result()
+    return entries
+
+
+def run(cube, modules, workers=WORKERS):
+    """
+    Precompute the queries in a helper process and prime the cube's memo with the results.
+    Returns a small status dict.
+    """
+    start = time.perf_counter()
+    with cube["lock"]:
+        version, tables = cube["version"], portable(cube)
+    # The pool lives in a fresh interpreter: Streamlit installs the app script as __main__,
+    # which spawned workers would re-execute, and forking the threaded server is unsafe
+    proc = subprocess.run(
+        [sys.executable, "-m", "utils.warmup"],
+        input=pickle.dumps((tables, modules, workers)), capture_output=True, cwd=ROOT, check=True,
+    )
+    entries = pickle.loads(proc.stdout)
+    for key, result in entries:
+        remember(cube, key, result, persist=True, version=version)  # dropped if batches were merged meanwhile
+    figures = _warm_figures(cube, modules, version)
+    status = {"states": len(filter_states(cube)), "queries": len(entries), "figures": figures, "seconds": round(time.perf_counter() - start, 2)}
+    logger.info("cache warm-up done: %s", status)
+    return status
+
+
+def _warm_figures(cube, modules, version):
+    """
+    Build every page's charts for the warmed states in this process, from the memo just primed.
+    Figures are live Plotly objects, so they cannot come from the pool. Returns the number built.
+    """
+    from utils import viz  # Plotly: only once the app is up
+
+    charts = [key for module in modules for key in getattr(importlib.import_module(f"sections.{module}"), "CHARTS", [])]
+    built = 0
+    # Leave at least half the figure cache to the viewers' own filter states
+    for selections in filter_states(cube)[:viz.FIGURE_CACHE_SIZE // 2 // max(len(charts), 1)]:
+        if cube["version"] != version:
+            break  # batches merged meanwhile: these figures would be stale
+        built += viz.prebuild(CubeView(cube, selections), charts)
+    return built
+
+
+def start(cube, modules):
+    """Run the warm-up on a background thread so the current rerun is not held up."""
+    thread = threading.Thread(target=_run_logged, args=(cube, modules), name="dashboard-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _run_logged(cube, modules):
+    try:
+        run(cube, modules)
+    except Exception:  # a failed warm-up only means colder first reruns
+        logger.exception("cache warm-up failed")
+
+
+if __name__ == "__main__":
+    # Helper process entry point: pickled (tables, modules, workers) in, (memo key, result) pairs out
+    tables, modules, workers = pickle.load(sys.stdin.buffer)
+    pickle.dump(compute(tables, modules, workers), sys.stdout.buffer)